@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Compares the representations of the read routes a display polls: size of
+# the body, and the time a client takes to decode it. Runs the app in process
+# on the simulated backend, no server is needed. The MessagePack ones are
+# only measured with msgpack installed.
+#
+# Usage: python3 benchmarks/encodings.py [--decodes 20000] [--json sizes.json]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import make_app  # noqa
+from core.web_server_utils import (COMPACT_JSON_MEDIATYPE,  # noqa
+                                   COMPACT_MSGPACK_MEDIATYPE, JSON_MEDIATYPE,
+                                   MSGPACK_MEDIATYPE)
+
+ROUTES = [
+    "/api/meta/current",
+    "/api/status/snapshot",
+    "/api/status/volume",
+]
+
+
+def decoder(mediatype: str):
+    if "msgpack" in mediatype:
+        return msgpack.unpackb
+    return json.loads
+
+
+# Output: microseconds per decode of body
+def time_decode(decode, body: bytes, decodes: int) -> float:
+    start = time.perf_counter()
+    for _ in range(decodes):
+        decode(body)
+    return (time.perf_counter() - start) / decodes * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decodes", type=int, default=20000)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    mediatypes = [JSON_MEDIATYPE, COMPACT_JSON_MEDIATYPE]
+    if msgpack is not None:
+        mediatypes += [MSGPACK_MEDIATYPE, COMPACT_MSGPACK_MEDIATYPE]
+
+    app = make_app(False, {}, "simulated", "benchmark", backend_options={"seed": 1})
+    client = app.test_client()
+
+    results = {}
+    for route in ROUTES:
+        print(route)
+        results[route] = {}
+        for mediatype in mediatypes:
+            response = client.get(route, headers={"Accept": mediatype})
+            assert response.content_type == mediatype, response.content_type
+            body = response.data
+            decode_us = time_decode(decoder(mediatype), body, args.decodes)
+            results[route][mediatype] = {"bytes": len(body), "decode_us": decode_us}
+            print(f"  {mediatype:<45} {len(body):5d} B  {decode_us:6.2f} us")
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
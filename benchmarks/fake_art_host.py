@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Local stand-in for the cover image host: every path answers with a PNG of
+# a colour derived from the path. Point the covers at it with
+# `fake_spotify.py --art-url http://127.0.0.1:8900/{track}.png`, or with the
+# simulated backend option {"art_url": "http://127.0.0.1:8900/{i}.png"}.
+#
+# Usage: python3 benchmarks/fake_art_host.py [--port 8900] [--size 640]
+#        [--latency 50]
+
+import argparse
+import hashlib
+import struct
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def make_png(size: int, colour: bytes) -> bytes:
+    row = b"\x00" + colour * size
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(row * size))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def make_handler(options):
+    class ArtHandler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_GET(self):
+            ArtHandler.requests_served += 1
+            time.sleep(options.latency / 1000)
+            colour = hashlib.sha256(self.path.encode()).digest()[:3]
+            body = make_png(options.size, colour)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            print(f"{ArtHandler.requests_served} {self.path}", flush=True)
+
+    return ArtHandler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--size", type=int, default=640, help="image side, in px")
+    parser.add_argument(
+        "--latency", type=float, default=50, help="reply latency, in ms"
+    )
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", options.port), make_handler(options))
+    print(f"serving covers on {options.port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Scripted stand-in for the Spotify client, owning org.mpris.MediaPlayer2.spotify
+# on the session bus. Meant to be run on a private bus, see run.py.
+#
+# Usage: python3 benchmarks/fake_spotify.py [--latency 2] [--jitter 1]
+#        [--artists 3] [--extra-keys 0] [--track-seconds 180]
+#        [--art-url https://i.scdn.co/image/{track:040x}]
+#        [--bus-name org.mpris.MediaPlayer2.spotify]
+
+import argparse
+import random
+import time
+
+import dbus
+import dbus.service
+from dbus.mainloop.glib import DBusGMainLoop
+from gi.repository import GLib
+
+BUS_NAME = "org.mpris.MediaPlayer2.spotify"
+OBJECT_PATH = "/org/mpris/MediaPlayer2"
+ROOT_INTERFACE = "org.mpris.MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+
+class FakeSpotify(dbus.service.Object):
+    def __init__(self, bus, options):
+        super().__init__(bus, OBJECT_PATH)
+        self.options = options
+        self.track = 0
+        self.playing = True
+        # (position in µs, time.monotonic() it was set at)
+        self.position_anchor = (0, time.monotonic())
+        self.properties = {
+            ROOT_INTERFACE: {
+                "CanQuit": dbus.Boolean(True),
+                "CanRaise": dbus.Boolean(True),
+                "HasTrackList": dbus.Boolean(False),
+                "Identity": dbus.String("Spotify"),
+                "DesktopEntry": dbus.String("spotify"),
+                "SupportedUriSchemes": dbus.Array(["spotify"], signature="s"),
+                "SupportedMimeTypes": dbus.Array([], signature="s"),
+            },
+            PLAYER_INTERFACE: {
+                "PlaybackStatus": dbus.String("Playing"),
+                "LoopStatus": dbus.String("None"),
+                "Rate": dbus.Double(1.0),
+                "Shuffle": dbus.Boolean(False),
+                "Metadata": self._metadata(),
+                "Volume": dbus.Double(1.0),
+                "MinimumRate": dbus.Double(1.0),
+                "MaximumRate": dbus.Double(1.0),
+                "CanGoNext": dbus.Boolean(True),
+                "CanGoPrevious": dbus.Boolean(True),
+                "CanPlay": dbus.Boolean(True),
+                "CanPause": dbus.Boolean(True),
+                "CanSeek": dbus.Boolean(True),
+                "CanControl": dbus.Boolean(True),
+            },
+        }
+
+    # Stands for the time the real client takes to answer
+    def _delay(self):
+        latency = random.gauss(self.options.latency, self.options.jitter)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def _metadata(self) -> dbus.Dictionary:
+        trackid = f"/com/spotify/track/{self.track:022d}"
+        metadata = {
+            "mpris:trackid": dbus.ObjectPath(trackid, variant_level=1),
+            "mpris:length": dbus.UInt64(
+                self.options.track_seconds * 1_000_000, variant_level=1
+            ),
+            "mpris:artUrl": dbus.String(
+                self.options.art_url.format(track=self.track), variant_level=1
+            ),
+            "xesam:album": dbus.String(f"Album {self.track // 10}", variant_level=1),
+            "xesam:albumArtist": dbus.Array(
+                ["Artist 0"], signature="s", variant_level=1
+            ),
+            "xesam:artist": dbus.Array(
+                [f"Artist {i}" for i in range(self.options.artists)],
+                signature="s",
+                variant_level=1,
+            ),
+            "xesam:autoRating": dbus.Double(0.5, variant_level=1),
+            "xesam:discNumber": dbus.Int32(1, variant_level=1),
+            "xesam:title": dbus.String(f"Track {self.track}", variant_level=1),
+            "xesam:trackNumber": dbus.Int32(self.track % 20 + 1, variant_level=1),
+            "xesam:url": dbus.String(
+                f"https://open.spotify.com/track/{self.track:022d}", variant_level=1
+            ),
+        }
+        for i in range(self.options.extra_keys):
+            metadata[f"xesam:extra{i}"] = dbus.String("x" * 32, variant_level=1)
+        return dbus.Dictionary(metadata, signature="sv")
+
+    def _position(self) -> int:
+        position, since = self.position_anchor
+        if self.playing:
+            position += int((time.monotonic() - since) * 1_000_000)
+        return min(position, self.options.track_seconds * 1_000_000)
+
+    def _set_position(self, position: int):
+        length = self.options.track_seconds * 1_000_000
+        self.position_anchor = (max(0, min(position, length)), time.monotonic())
+        self.Seeked(dbus.Int64(self.position_anchor[0]))
+
+    def _set_player_properties(self, **changed):
+        self.properties[PLAYER_INTERFACE].update(changed)
+        self.PropertiesChanged(PLAYER_INTERFACE, changed, [])
+
+    def _set_playing(self, playing: bool):
+        self.position_anchor = (self._position(), time.monotonic())
+        self.playing = playing
+        self._set_player_properties(
+            PlaybackStatus=dbus.String("Playing" if playing else "Paused")
+        )
+
+    def _change_track(self, offset: int):
+        self.track = max(0, self.track + offset)
+        self.position_anchor = (0, time.monotonic())
+        self._set_player_properties(Metadata=self._metadata())
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="ss", out_signature="v")
+    def Get(self, interface, name):
+        self._delay()
+        if interface == PLAYER_INTERFACE and name == "Position":
+            return dbus.Int64(self._position())
+        try:
+            return self.properties[interface][name]
+        except KeyError:
+            raise dbus.exceptions.DBusException(
+                f"No such property {interface}.{name}",
+                name="org.freedesktop.DBus.Error.InvalidArgs",
+            )
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="s", out_signature="a{sv}")
+    def GetAll(self, interface):
+        self._delay()
+        properties = dict(self.properties.get(interface, {}))
+        if interface == PLAYER_INTERFACE:
+            properties["Position"] = dbus.Int64(self._position())
+        return properties
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="ssv")
+    def Set(self, interface, name, value):
+        self._delay()
+        self.properties[interface][name] = value
+        self.PropertiesChanged(interface, {name: value}, [])
+
+    @dbus.service.signal(PROPERTIES_INTERFACE, signature="sa{sv}as")
+    def PropertiesChanged(self, interface, changed, invalidated):
+        pass
+
+    @dbus.service.signal(PLAYER_INTERFACE, signature="x")
+    def Seeked(self, position):
+        pass
+
+    @dbus.service.method(ROOT_INTERFACE)
+    def Raise(self):
+        self._delay()
+
+    @dbus.service.method(ROOT_INTERFACE)
+    def Quit(self):
+        self._delay()  # Keep running, the benchmark needs the player
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Play(self):
+        self._delay()
+        self._set_playing(True)
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Pause(self):
+        self._delay()
+        self._set_playing(False)
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def PlayPause(self):
+        self._delay()
+        self._set_playing(not self.playing)
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Stop(self):
+        self._delay()
+        self._set_playing(False)
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Next(self):
+        self._delay()
+        self._change_track(1)
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Previous(self):
+        self._delay()
+        self._change_track(-1)
+
+    @dbus.service.method(PLAYER_INTERFACE, in_signature="x")
+    def Seek(self, offset):
+        self._delay()
+        self._set_position(self._position() + int(offset))
+
+    @dbus.service.method(PLAYER_INTERFACE, in_signature="ox")
+    def SetPosition(self, trackid, position):
+        self._delay()
+        current = self.properties[PLAYER_INTERFACE]["Metadata"]["mpris:trackid"]
+        if trackid == current:
+            self._set_position(int(position))
+
+    @dbus.service.method(PLAYER_INTERFACE, in_signature="s")
+    def OpenUri(self, uri):
+        self._delay()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--latency", type=float, default=2, help="mean reply latency, in ms"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=1, help="reply latency deviation, in ms"
+    )
+    parser.add_argument("--artists", type=int, default=3)
+    parser.add_argument(
+        "--extra-keys", type=int, default=0, help="metadata entries to add"
+    )
+    parser.add_argument("--track-seconds", type=int, default=180)
+    parser.add_argument(
+        "--art-url",
+        default="https://i.scdn.co/image/{track:040x}",
+        help="cover url, formatted with the track number, see fake_art_host.py",
+    )
+    parser.add_argument(
+        "--bus-name", default=BUS_NAME, help="to run several fake players"
+    )
+    options = parser.parse_args()
+
+    DBusGMainLoop(set_as_default=True)
+    bus = dbus.SessionBus()
+    name = dbus.service.BusName(options.bus_name, bus, do_not_queue=True)
+    player = FakeSpotify(bus, options)  # noqa: F841
+    print(f"{name.get_name()} ready", flush=True)
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Load generator for the /api/* routes of a running server. Every endpoint is
+# hammered in turn by --concurrency workers for --duration seconds, then its
+# throughput and latency percentiles are reported.
+#
+# Usage: python3 benchmarks/load.py [--url http://localhost:8080]
+#        [--user user:password] [--concurrency 8] [--duration 5]
+#        [--only /api/status/volume] [--json results.json]
+
+import argparse
+import base64
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+
+# (HTTP method, route, JSON body)
+ENDPOINTS = [
+    ("GET", "/api/meta/current", None),
+    ("GET", "/api/meta/playing", None),
+    ("POST", "/api/meta/show", None),
+    ("POST", "/api/meta/sync", None),
+    ("POST", "/api/player/play", None),
+    ("POST", "/api/player/pause", None),
+    ("POST", "/api/player/playpause", None),
+    ("POST", "/api/player/stop", None),
+    ("POST", "/api/player/next", None),
+    ("POST", "/api/player/prev", None),
+    ("POST", "/api/player/seek", {"seconds": 0}),
+    ("GET", "/api/status/position", None),
+    ("POST", "/api/status/position", {"seconds": 30}),
+    ("GET", "/api/status/loop", None),
+    ("POST", "/api/status/loop", {"loop": "None"}),
+    ("GET", "/api/status/shuffle", None),
+    ("POST", "/api/status/shuffle", {"shuffle": False}),
+    ("GET", "/api/status/volume", None),
+    ("POST", "/api/status/volume", {"volume": 0.5}),
+    ("GET", "/api/status/snapshot", None),
+    (
+        "POST",
+        "/api/batch",
+        {"operations": [{"op": "set_volume", "args": {"volume": 0.5}}, {"op": "play"}]},
+    ),
+]
+
+
+def percentile(values: list, percent: float) -> float:
+    if not values:
+        return float("nan")
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+class Worker(threading.Thread):
+    def __init__(self, url, headers, method, route, body, deadline):
+        super().__init__(daemon=True)
+        self.url = url
+        self.headers = headers
+        self.method = method
+        self.route = route
+        self.body = json.dumps(body) if body is not None else None
+        self.deadline = deadline
+        self.timings = []
+        self.errors = 0
+        self.connection = None
+
+    def _request(self):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.url.hostname, self.url.port or 80, timeout=30
+            )
+        try:
+            self.connection.request(
+                self.method, self.route, body=self.body, headers=self.headers
+            )
+            response = self.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection = None
+            raise
+        if response.will_close:
+            self.connection.close()
+            self.connection = None
+        return response.status
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            start = time.perf_counter()
+            try:
+                status = self._request()
+            except (http.client.HTTPException, OSError):
+                self.errors += 1
+                continue
+            self.timings.append(time.perf_counter() - start)
+            if status >= 400:
+                self.errors += 1
+        if self.connection is not None:
+            self.connection.close()
+
+
+def run_endpoint(url, headers, method, route, body, concurrency, duration) -> dict:
+    deadline = time.perf_counter() + duration
+    workers = [
+        Worker(url, headers, method, route, body, deadline) for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    timings = sorted(t * 1000 for worker in workers for t in worker.timings)
+    return {
+        "method": method,
+        "route": route,
+        "requests": len(timings),
+        "errors": sum(worker.errors for worker in workers),
+        "throughput": len(timings) / elapsed,
+        "p50": percentile(timings, 50),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+    }
+
+
+def print_report(results: list):
+    print(
+        f"{'endpoint':32} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}"
+    )
+    for result in results:
+        endpoint = f"{result['method']} {result['route']}"
+        print(
+            f"{endpoint:32} {result['throughput']:9.1f} {result['p50']:8.2f} "
+            f"{result['p95']:8.2f} {result['p99']:8.2f} {result['errors']:7}"
+        )
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--user", default=None, help="user:password")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--duration", type=float, default=5, help="seconds spent on each endpoint"
+    )
+    parser.add_argument("--only", action="append", help="route to run, may be repeated")
+    parser.add_argument("--json", default=None, help="also write results there")
+    args = parser.parse_args(argv)
+
+    url = urllib.parse.urlsplit(args.url)
+    headers = {"Content-Type": "application/json"}
+    if args.user is not None:
+        headers["Authorization"] = "Basic " + base64.b64encode(
+            args.user.encode()
+        ).decode("ascii")
+
+    results = []
+    for method, route, body in ENDPOINTS:
+        if args.only and route not in args.only:
+            continue
+        results.append(
+            run_endpoint(
+                url, headers, method, route, body, args.concurrency, args.duration
+            )
+        )
+    print_report(results)
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(
+                {"concurrency": args.concurrency, "results": results}, file, indent=2
+            )
+    return results
+
+
+if __name__ == "__main__":
+    main()
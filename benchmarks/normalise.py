@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Micro-benchmark of the conversion of Spotify metadata from D-Bus types.
+#
+# Usage: python3 benchmarks/normalise.py [--number 20000]
+
+import argparse
+import os
+import sys
+import timeit
+
+import dbus
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.backends.dbus_api import DBusSpotifyAPIBackend, normalise_value  # noqa
+
+
+# What Spotify sends as Metadata, with the variant levels it uses
+def spotify_metadata(track: int = 0) -> dbus.Dictionary:
+    return dbus.Dictionary(
+        {
+            "mpris:trackid": dbus.String(
+                f"/com/spotify/track/4uLU6hMCjMI75M1A2tKUQ{track}", variant_level=1
+            ),
+            "mpris:length": dbus.UInt64(215_000_000, variant_level=1),
+            "mpris:artUrl": dbus.String(
+                "https://i.scdn.co/image/ab67616d0000b273e319baafd16e84f0408af2a0",
+                variant_level=1,
+            ),
+            "xesam:album": dbus.String("A Night at the Opera", variant_level=1),
+            "xesam:albumArtist": dbus.Array(
+                [dbus.String("Queen")], signature="s", variant_level=1
+            ),
+            "xesam:artist": dbus.Array(
+                [dbus.String("Queen")], signature="s", variant_level=1
+            ),
+            "xesam:autoRating": dbus.Double(0.79, variant_level=1),
+            "xesam:discNumber": dbus.Int32(1, variant_level=1),
+            "xesam:title": dbus.String("Bohemian Rhapsody", variant_level=1),
+            "xesam:trackNumber": dbus.Int32(11, variant_level=1),
+            "xesam:url": dbus.String(
+                f"https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQ{track}",
+                variant_level=1,
+            ),
+        },
+        signature="sv",
+    )
+
+
+# The isinstance chain used before type dispatch, kept as the baseline
+def isinstance_normalise(value):
+    if isinstance(value, dbus.Dictionary):
+        return {
+            isinstance_normalise(k): isinstance_normalise(v) for k, v in value.items()
+        }
+    elif isinstance(value, dbus.Array):
+        return [isinstance_normalise(v) for v in value]
+    elif isinstance(value, (dbus.String, dbus.ObjectPath)):
+        return str(value)
+    elif isinstance(
+        value,
+        (
+            dbus.Int64,
+            dbus.Int32,
+            dbus.Int16,
+            dbus.Byte,
+            dbus.UInt64,
+            dbus.UInt32,
+            dbus.UInt16,
+        ),
+    ):
+        return int(value)
+    elif isinstance(value, dbus.Boolean):
+        return bool(value)
+    elif isinstance(value, dbus.Double):
+        return float(value)
+    return value
+
+
+def baseline_current_song(raw: dbus.Dictionary) -> dict:
+    metadata = isinstance_normalise(raw)
+    return {k.split(":")[-1]: v for k, v in metadata.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Only the conversion helpers are needed, don't connect to the bus
+    backend = DBusSpotifyAPIBackend.__new__(DBusSpotifyAPIBackend)
+    backend.metadata_memo = None
+
+    raw = spotify_metadata()
+    same_track = spotify_metadata()  # New message, same content
+    tracks = [spotify_metadata(track) for track in range(10)]
+
+    def memoised_current_song(value):
+        return backend._strip_metadata_keys(backend._normalise_metadata(value))
+
+    assert baseline_current_song(raw) == memoised_current_song(same_track)
+    assert isinstance_normalise(raw) == normalise_value(raw)
+
+    cases = [
+        ("isinstance chain + key split", lambda: baseline_current_song(raw)),
+        ("type dispatch, no memo", lambda: normalise_value(raw)),
+        ("type dispatch, memo hit", lambda: memoised_current_song(same_track)),
+        (
+            "type dispatch, memo miss",
+            lambda: [memoised_current_song(track) for track in tracks],
+            len(tracks),
+        ),
+    ]
+    for case in cases:
+        name, function = case[0], case[1]
+        calls = case[2] if len(case) > 2 else 1
+        seconds = min(timeit.repeat(function, number=args.number, repeat=5))
+        print(f"{name:30} {seconds / args.number / calls * 1_000_000:8.2f}µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Runs the whole benchmark on a headless box: a private dbus-daemon, the fake
+# Spotify client on it, the API server on top, then the load generator.
+# With --backend simulated, the server uses the in-memory backend instead and
+# no D-Bus is involved.
+#
+# Usage: python3 benchmarks/run.py [--latency 2] [--jitter 1] [--artists 3]
+#        [--extra-keys 0] [--concurrency 8] [--duration 5]
+#        [--only /api/status/volume] [--json results.json]
+#        [--backend simulated] [--backend-options '{"seed": 1}']
+#        [--server waitress] [--threads 8]
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import load
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+
+SERVER = """
+import json
+import sys
+from core import make_app
+
+port, backend, options, server, threads = sys.argv[1:]
+app = make_app(False, {}, backend, "benchmark", backend_options=json.loads(options))
+if server == "waitress":
+    from waitress import serve
+
+    serve(app, host="127.0.0.1", port=int(port), threads=int(threads))
+else:
+    app.run(host="127.0.0.1", port=int(port), threaded=True)
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"server did not listen on {port} in {timeout}s")
+
+
+# Output: the environment pointing to the private bus
+def start_fake_spotify(args, processes: list) -> dict:
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    processes.append(daemon)
+    env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS=daemon.stdout.readline().strip())
+
+    fake = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(BENCHMARKS, "fake_spotify.py"),
+            f"--latency={args.latency}",
+            f"--jitter={args.jitter}",
+            f"--artists={args.artists}",
+            f"--extra-keys={args.extra_keys}",
+        ],
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    processes.append(fake)
+    fake.stdout.readline()  # Wait for the bus name to be owned
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", default="2", help="fake reply latency, in ms")
+    parser.add_argument("--jitter", default="1", help="fake latency deviation, in ms")
+    parser.add_argument("--artists", default="3")
+    parser.add_argument("--extra-keys", default="0")
+    parser.add_argument("--concurrency", default="8")
+    parser.add_argument("--duration", default="5")
+    parser.add_argument("--only", action="append", default=[])
+    parser.add_argument("--json", default=None)
+    parser.add_argument("--backend", default="dbus", choices=["dbus", "simulated"])
+    parser.add_argument(
+        "--backend-options", default="{}", help="JSON keyword arguments"
+    )
+    parser.add_argument(
+        "--server", default="development", choices=["development", "waitress"]
+    )
+    parser.add_argument("--threads", default="8", help="waitress worker threads")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        env = dict(os.environ)
+        if args.backend == "dbus":
+            env = start_fake_spotify(args, processes)
+
+        port = free_port()
+        processes.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    SERVER,
+                    str(port),
+                    args.backend,
+                    args.backend_options,
+                    args.server,
+                    args.threads,
+                ],
+                env=env,
+                cwd=ROOT,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+        wait_for_port(port)
+
+        load_args = [
+            f"--url=http://127.0.0.1:{port}",
+            f"--concurrency={args.concurrency}",
+            f"--duration={args.duration}",
+        ]
+        load_args += [f"--only={route}" for route in args.only]
+        if args.json is not None:
+            load_args.append(f"--json={args.json}")
+        load.main(load_args)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
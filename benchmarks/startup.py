@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Measures how fast a fresh server process is useful: the time to import
+# core, to run make_app, and from spawning the server until /health and
+# /swagger.json answer. No player needs to run, the backend is only built on
+# first use. Fails with --max-ready if the server takes longer than that.
+#
+# Usage: python3 benchmarks/startup.py [--runs 5] [--backend dbus]
+#        [--max-ready 2.0] [--json startup.json]
+
+import argparse
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from run import ROOT, SERVER, free_port
+
+IMPORT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+from core import make_app
+
+imported = time.perf_counter()
+make_app(False, {}, sys.argv[1], "benchmark")
+print(json.dumps(
+    {
+        "import": imported - start,
+        "make_app": time.perf_counter() - imported,
+        "dbus_imported": "dbus" in sys.modules,
+    }
+))
+"""
+
+
+# Output: seconds until path answered 200, polling every millisecond
+def wait_for(port: int, path: str, start: float, timeout: float = 30) -> float:
+    while time.perf_counter() - start < timeout:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", path)
+            if connection.getresponse().status == 200:
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.001)
+    raise TimeoutError(f"{path} did not answer in {timeout}s")
+
+
+def measure_once(backend: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT, backend],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(output.stdout.splitlines()[-1])
+
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            SERVER,
+            str(port),
+            backend,
+            "{}",
+            "development",
+            "1",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        result["health"] = wait_for(port, "/health", start)
+        result["swagger"] = wait_for(port, "/swagger.json", start)
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backend", default="dbus")
+    parser.add_argument(
+        "--max-ready", type=float, default=None, help="seconds, for CI"
+    )
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    runs = [measure_once(args.backend) for _ in range(args.runs)]
+    results = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import", "make_app", "health", "swagger")
+    }
+    results["dbus_imported"] = any(run["dbus_imported"] for run in runs)
+
+    print(f"backend {args.backend}, median of {args.runs} runs")
+    for key in ("import", "make_app", "health", "swagger"):
+        print(f"  {key:<9} {results[key] * 1000:8.1f} ms")
+    print(f"  dbus imported by make_app: {results['dbus_imported']}")
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.max_ready is not None and results["health"] > args.max_ready:
+        print(f"/health took more than {args.max_ready}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Compares the round trip latency of the /api/player/* and /api/status/*
+# routes with the same commands sent over the /api/ws control channel.
+#
+# Usage: python3 benchmarks/ws_latency.py [--url http://localhost:8080]
+#        [--user user:password] [--count 500]
+
+import argparse
+import base64
+import json
+import statistics
+import time
+import urllib.request
+
+from simple_websocket import Client
+
+# (command sent on the WebSocket, HTTP method, HTTP route, HTTP JSON body)
+COMMANDS = [
+    ("get_volume", {}, "GET", "/api/status/volume", None),
+    ("set_volume", {"volume": 0.5}, "POST", "/api/status/volume", {"volume": 0.5}),
+    ("play", {}, "POST", "/api/player/play", None),
+    ("seek", {"seconds": 0}, "POST", "/api/player/seek", {"seconds": 0}),
+]
+
+
+def percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def summary(timings: list) -> str:
+    timings = [t * 1000 for t in timings]
+    return (
+        f"mean {statistics.mean(timings):7.3f}ms  "
+        f"p50 {percentile(timings, 50):7.3f}ms  "
+        f"p95 {percentile(timings, 95):7.3f}ms  "
+        f"p99 {percentile(timings, 99):7.3f}ms"
+    )
+
+
+def time_http(url: str, headers: dict, method: str, route: str, body, count: int):
+    data = json.dumps(body).encode() if body is not None else None
+    timings = []
+    for _ in range(count):
+        http_request = urllib.request.Request(
+            url + route,
+            data=data,
+            method=method,
+            headers={**headers, "Content-Type": "application/json"},
+        )
+        start = time.perf_counter()
+        try:
+            urllib.request.urlopen(http_request).read()
+        except urllib.error.HTTPError as e:
+            e.read()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_ws(ws, command: str, args: dict, count: int):
+    timings = []
+    for request_id in range(count):
+        start = time.perf_counter()
+        ws.send(json.dumps({"id": request_id, "cmd": command, "args": args}))
+        while json.loads(ws.receive()).get("id") != request_id:
+            pass  # Skip pushed events
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--user", default=None, help="user:password")
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    headers = {}
+    if args.user is not None:
+        headers["Authorization"] = "Basic " + base64.b64encode(
+            args.user.encode()
+        ).decode("ascii")
+
+    ws = Client.connect(args.url.replace("http", "ws", 1) + "/api/ws", headers=headers)
+    try:
+        for command, command_args, method, route, body in COMMANDS:
+            http = time_http(args.url, headers, method, route, body, args.count)
+            socket = time_ws(ws, command, command_args, args.count)
+            print(f"{command}")
+            print(f"  HTTP {method:4} {route:20} {summary(http)}")
+            print(f"  WebSocket {'':20} {summary(socket)}")
+    finally:
+        ws.close()
+
+
+if __name__ == "__main__":
+    main()
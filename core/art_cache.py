@@ -0,0 +1,276 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+
+from .metrics import record_cache
+from .singleflight import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:  # Resized variants are only served with Pillow installed
+    Image = None
+
+ART_CACHE = None
+
+# Covers bigger than this are refused, whatever the image host sends
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Number of tracks whose cover can be asked for by trackid
+MAX_KNOWN_TRACKS = 256
+# Number of recently asked variant sizes prefetched on track changes
+MAX_PREFETCHED_SIZES = 4
+
+# Names of the files of the cache: a hash of the cover url, and the size of
+# the variant. Other files of the directory are never adopted nor evicted
+ENTRY_NAME = re.compile(r"^[0-9a-f]{32}(-[0-9]+)?$")
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp"),
+)
+
+
+def _content_type(data: bytes) -> str:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    return "application/octet-stream"
+
+
+# Cover images of the tracks played, stored in a directory and evicted least
+# recently used first once they exceed max_bytes. Only the artUrl of tracks
+# seen in the player metadata are ever fetched, so the endpoint can not be
+# used to reach arbitrary hosts.
+class ArtCache:
+    def __init__(self, directory: str, max_bytes: int, fetch_timeout: float = 10.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetch_timeout = fetch_timeout
+        self.lock = threading.Lock()
+        # Concurrent requests for a cover not cached yet share one download
+        self.flight = SingleFlight(cache="art_downloads")
+        # file name -> size in bytes, least recently used first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        # trackid -> artUrl, of the last tracks seen
+        self.known_tracks = OrderedDict()
+        # size -> None, the variant sizes last asked for
+        self.recent_sizes = OrderedDict()
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and ENTRY_NAME.match(entry.name):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+        with self.lock:
+            self._evict()
+
+    def remember(self, song: dict):
+        trackid, url = song.get("trackid"), song.get("artUrl")
+        if not trackid or not url or not url.startswith(("http://", "https://")):
+            return
+        with self.lock:
+            self.known_tracks[trackid] = url
+            self.known_tracks.move_to_end(trackid)
+            while len(self.known_tracks) > MAX_KNOWN_TRACKS:
+                self.known_tracks.popitem(last=False)
+
+    # Output: {"status": True, "data": bytes, "content_type": str, "etag": str}
+    def get(self, trackid: str, size: int = None) -> dict:
+        with self.lock:
+            url = self.known_tracks.get(trackid)
+            if size is not None:
+                self.recent_sizes[size] = None
+                self.recent_sizes.move_to_end(size)
+                while len(self.recent_sizes) > MAX_PREFETCHED_SIZES:
+                    self.recent_sizes.popitem(last=False)
+        if url is None:
+            return {
+                "status": False,
+                "error": "no cover known for this track",
+                "http_status_code": 404,
+            }
+        if size is not None and Image is None:
+            return {
+                "status": False,
+                "error": "resizing covers needs Pillow installed",
+                "http_status_code": 400,
+            }
+
+        name = hashlib.sha256(url.encode()).hexdigest()[:32]
+        if size is None:
+            return self.flight.do(name, lambda: self._get_original(url, name))
+        variant = f"{name}-{size}"
+        return self.flight.do(variant, lambda: self._get_variant(url, name, size))
+
+    # Fetches the cover of the track and its recently asked variants, if not
+    # cached yet
+    def prefetch(self, song: dict):
+        self.remember(song)
+        trackid = song.get("trackid")
+        with self.lock:
+            if trackid not in self.known_tracks:
+                return
+            sizes = [None] + list(self.recent_sizes)
+        for size in sizes:
+            self.get(trackid, size)
+
+    def _read(self, name: str) -> bytes:
+        with self.lock:
+            if name not in self.entries:
+                return None
+            self.entries.move_to_end(name)
+        try:
+            with open(os.path.join(self.directory, name), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            with self.lock:
+                if name in self.entries:
+                    self.total_bytes -= self.entries.pop(name)
+            return None
+
+    # Each write goes through its own temporary file, as other processes may
+    # store the same cover at once. A cover that can't be written (disk full,
+    # directory gone...) is still served, and fetched again next time
+    def _store(self, name: str, data: bytes):
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, os.path.join(self.directory, name))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            self._evict()
+
+    # Must be called with lock held. Keeps the last stored file even if it
+    # is bigger than max_bytes on its own
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            if not ENTRY_NAME.match(name):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _output(self, name: str, data: bytes) -> dict:
+        return {
+            "status": True,
+            "data": data,
+            "content_type": _content_type(data),
+            "etag": name,
+        }
+
+    def _get_original(self, url: str, name: str) -> dict:
+        data = self._read(name)
+        record_cache("art", data is not None)
+        if data is not None:
+            return self._output(name, data)
+
+        try:
+            with urllib.request.urlopen(url, timeout=self.fetch_timeout) as reply:
+                data = reply.read(MAX_IMAGE_BYTES + 1)
+        except (urllib.error.URLError, OSError) as e:
+            return {
+                "status": False,
+                "error": f"could not fetch cover: {e}",
+                "http_status_code": 502,
+            }
+        if len(data) > MAX_IMAGE_BYTES:
+            return {
+                "status": False,
+                "error": "cover is too big",
+                "http_status_code": 502,
+            }
+        self._store(name, data)
+        return self._output(name, data)
+
+    def _get_variant(self, url: str, name: str, size: int) -> dict:
+        variant = f"{name}-{size}"
+        data = self._read(variant)
+        record_cache("art", data is not None)
+        if data is not None:
+            return self._output(variant, data)
+
+        original = self.flight.do(name, lambda: self._get_original(url, name))
+        if not original["status"]:
+            return original
+        try:
+            image = Image.open(io.BytesIO(original["data"]))
+            image_format = image.format
+            image.thumbnail((size, size))
+            output = io.BytesIO()
+            image.save(output, format=image_format)
+        except (OSError, ValueError) as e:
+            return {
+                "status": False,
+                "error": f"could not resize cover: {e}",
+                "http_status_code": 502,
+            }
+        data = output.getvalue()
+        self._store(variant, data)
+        return self._output(variant, data)
+
+
+def _prefetch_covers(art_cache: ArtCache, subscription):
+    while True:
+        event = subscription.get()
+        if event is None or event[0] != "track":
+            continue
+        try:
+            art_cache.prefetch(event[1]["current_song"])
+        except OSError:
+            pass  # Fetched again when asked for
+
+
+# Enables the cover cache, prefetching the covers of the tracks the backend
+# switches to. Disabled with directory set to None
+def set_art_cache(directory: str, max_bytes: int, backend=None):
+    global ART_CACHE
+    if directory is None:
+        ART_CACHE = None
+        return
+    ART_CACHE = ArtCache(directory, max_bytes)
+    if backend is not None:
+        threading.Thread(
+            target=_prefetch_covers,
+            args=(ART_CACHE, backend.events.subscribe()),
+            name="art-prefetch",
+            daemon=True,
+        ).start()
+
+
+def get_art_cache() -> ArtCache:
+    return ART_CACHE
@@ -0,0 +1,94 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from .db import check_password, get_users_version, get_valid_users
+from .metrics import record_cache
+
+# Secret used to sign bearer tokens. Tokens signed with a random secret do not
+# survive a restart of the server
+TOKEN_SECRET = secrets.token_bytes(32)
+# Seconds a bearer token stays valid
+TOKEN_LIFETIME = 3600
+
+# Number of Basic Authorization headers kept once verified
+VERIFIED_CACHE_SIZE = 256
+
+_verified_lock = threading.Lock()
+# SHA-256 of the Authorization header -> (username, users version it was
+# verified against). Hashed so that no password is kept in memory
+_verified_headers = OrderedDict()
+
+
+def set_token_settings(secret: bytes = None, lifetime: int = TOKEN_LIFETIME):
+    global TOKEN_SECRET, TOKEN_LIFETIME
+    TOKEN_SECRET = secret if secret is not None else secrets.token_bytes(32)
+    TOKEN_LIFETIME = lifetime
+
+
+def _sign(payload: str) -> str:
+    return hmac.new(TOKEN_SECRET, payload.encode("utf-8"), "sha256").hexdigest()
+
+
+# Tokens look like "<username>.<expiry timestamp>.<hmac-sha256 hex digest>"
+def issue_token(username: str) -> tuple:
+    expires = int(time.time()) + TOKEN_LIFETIME
+    payload = f"{username}.{expires}"
+    return f"{payload}.{_sign(payload)}", expires
+
+
+# Output: the username the token was issued to, or None
+def verify_token(token: str):
+    # Tokens are ASCII, and compare_digest only takes ASCII strings
+    if not token.isascii():
+        return None
+    payload, _, signature = token.rpartition(".")
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+    username, _, expires = payload.rpartition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return None
+    if username not in get_valid_users():
+        return None
+    return username
+
+
+# Output: the username the header authenticates, or None
+def verify_basic(auth_header: str):
+    users_version = get_users_version()
+    key = hashlib.sha256(auth_header.encode()).digest()
+    with _verified_lock:
+        cached = _verified_headers.get(key)
+        if cached is not None and cached[1] == users_version:
+            _verified_headers.move_to_end(key)
+            record_cache("verified_basic_auth", True)
+            return cached[0]
+    record_cache("verified_basic_auth", False)
+
+    try:
+        decoded = base64.b64decode(auth_header[len("Basic ") :]).decode("utf-8")
+        username, password = decoded.split(":", 1)
+    except Exception:
+        return None
+    if not check_password(username, password):
+        return None
+
+    with _verified_lock:
+        _verified_headers[key] = (username, users_version)
+        _verified_headers.move_to_end(key)
+        while len(_verified_headers) > VERIFIED_CACHE_SIZE:
+            _verified_headers.popitem(last=False)
+    return username
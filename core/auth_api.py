@@ -0,0 +1,57 @@
+from flask import g, request
+from flask_restx import Namespace, Resource, fields
+
+from .auth import issue_token
+from .web_server_utils import basic_auth_required, error_model, formated_output
+
+auth_api = Namespace(
+    "Auth API",
+    description="Exchange credentials for short lived bearer tokens",
+    path="/api/auth",
+)
+
+
+token_model = auth_api.model(
+    "Token",
+    {
+        "status": fields.Boolean(
+            description="Status of the executed action",
+            default=True,
+        ),
+        "token": fields.String(
+            description='Send it as "Authorization: Bearer <token>"',
+        ),
+        "expires": fields.Integer(
+            description="Unix timestamp after which the token is refused",
+        ),
+    },
+)
+
+
+@auth_api.route("/token")
+class Token(Resource):
+    @auth_api.doc(security="basic")
+    @auth_api.response(200, "Ok", token_model)
+    @auth_api.response(400, "Error", error_model)
+    @auth_api.response(401, "Not Basic credentials", error_model)
+    @basic_auth_required
+    def post(self):
+        if not isinstance(g.user, str):
+            return formated_output(
+                {
+                    "status": False,
+                    "error": "authentication is disabled",
+                    "http_status_code": 400,
+                }
+            )
+        # A token must not renew itself past its lifetime
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return formated_output(
+                {
+                    "status": False,
+                    "error": "tokens are only issued for Basic credentials",
+                    "http_status_code": 401,
+                }
+            )
+        token, expires = issue_token(g.user)
+        return formated_output({"status": True, "token": token, "expires": expires})
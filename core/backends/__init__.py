@@ -1,2 +1,50 @@
-from .backend import SpotifyAPIBackend
-from .dbus_api import DBusSpotifyAPIBackend
+import importlib
+from importlib.metadata import entry_points
+
+from .backend import SpotifyAPIBackend, backend_methods
+from .lazy import LazyBackend
+
+# Entry point group other packages register their backends in, as
+#   name = "package.module:BackendClass"
+ENTRY_POINT_GROUP = "local_spotify_api.backends"
+
+# Backend name -> "module:class" (or the class itself), only imported once
+# selected so that unused backends never load their dependencies
+BACKENDS = {
+    "dbus": ".dbus_api:DBusSpotifyAPIBackend",
+    "simulated": ".simulated_api:SimulatedSpotifyAPIBackend",
+}
+
+# Kept importable from here, imported on first access
+_LAZY_EXPORTS = {
+    "DBusSpotifyAPIBackend": "dbus",
+    "SimulatedSpotifyAPIBackend": "simulated",
+}
+
+
+def _entry_points() -> dict:
+    return {entry.name: entry for entry in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def available_backends() -> list:
+    return sorted(set(BACKENDS) | set(_entry_points()))
+
+
+# Output: the backend class registered under name. Raises KeyError if none is
+def load_backend(name: str) -> type:
+    target = BACKENDS.get(name)
+    if target is None:
+        entry = _entry_points().get(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry.load()
+    if not isinstance(target, str):
+        return target
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module, __name__), attribute)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return load_backend(_LAZY_EXPORTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,9 +7,19 @@
 ##############
 
 
+from ..events import EventBus
+
+
 class SpotifyAPIBackend:
     def __init__(self):
-        pass
+        # Backends publish player changes here, as (event, data) with:
+        #   "track":   {"current_song": [implementation dependent]}
+        #   "playing": {"playing": str}
+        #   "volume":  {"volume": 0.0 - 1.0}
+        #   "shuffle": {"shuffle": bool}
+        #   "loop":    {"loop": "None" | "Playlist" | "Track"}
+        #   "seeked":  {"position": int}
+        self.events = EventBus()
 
     # Every Output will either contain:
     #   {"status": False, "error": "description of the error"}
@@ -106,7 +116,41 @@ class SpotifyAPIBackend:
     def get_playing(self) -> dict:
         raise NotImplementedError("get_playing is not implemented !")
 
+    # Input: None | list of state keys to return (all of them by default)
+    # Output: {"state": {"position": int, "loop": str, "shuffle": bool,
+    #                    "volume": float, "playing": str, "current_song": dict}}
+    def get_state(self, fields: list = None) -> dict:
+        raise NotImplementedError("get_state is not implemented !")
+
+    # Input: None
+    # Output: str that changes whenever the player state but the position
+    #         changes (used as ETag), or None if the backend can not tell
+    def get_state_tag(self) -> str:
+        return None
+
+    # Input: None
+    # Output: None. Releases what the backend holds once it is not used anymore
+    def close(self):
+        pass
+
     # Input: None
     # Output: {}
     def resync(self) -> dict:
         raise NotImplementedError("resync is not implemented !")
+
+
+# Methods of the interface that are not calls to the player answering a status
+NOT_BACKEND_CALLS = ("get_state_tag", "close")
+
+
+# Output: names of the methods of the SpotifyAPIBackend interface calling the
+#         player, only those starting with prefix if given
+def backend_methods(prefix: str = None) -> list:
+    return [
+        name
+        for name, value in vars(SpotifyAPIBackend).items()
+        if callable(value)
+        and not name.startswith("_")
+        and name not in NOT_BACKEND_CALLS
+        and (prefix is None or name.startswith(prefix))
+    ]
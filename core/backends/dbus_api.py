@@ -7,65 +7,518 @@
 ##############
 
 
+import functools
+import threading
+import time
+
 import dbus
+from dbus.mainloop.glib import DBusGMainLoop, threads_init
+from gi.repository import GLib
 
+from ..metrics import DBUS_CALLS, DBUS_DURATION, record_cache
 from .backend import SpotifyAPIBackend
+from .mpris import (BUS_NAME, DBUS_NAME, DBUS_PATH, MPRIS_PREFIX, OBJECT_PATH,
+                    PLAYER_INTERFACE, PROPERTIES_INTERFACE)
+
+# get_state() key -> Player property it is read from
+STATE_PROPERTIES = {
+    "position": "Position",
+    "loop": "LoopStatus",
+    "shuffle": "Shuffle",
+    "volume": "Volume",
+    "playing": "PlaybackStatus",
+    "current_song": "Metadata",
+}
+
+# Player property -> (event published when it changes, event data key)
+PROPERTY_EVENTS = {
+    "Metadata": ("track", "current_song"),
+    "PlaybackStatus": ("playing", "playing"),
+    "Volume": ("volume", "volume"),
+    "Shuffle": ("shuffle", "shuffle"),
+    "LoopStatus": ("loop", "loop"),
+}
+
+MAIN_LOOP = None
+MAIN_LOOP_THREAD = None
+# Backends of several players and the players watcher start at the same time
+_main_loop_lock = threading.Lock()
+
+
+def _normalise_dictionary(value: dbus.Dictionary) -> dict:
+    return {normalise_value(k): normalise_value(v) for k, v in value.items()}
+
+
+def _normalise_array(value: dbus.Array) -> list:
+    return [normalise_value(v) for v in value]
+
+
+def _keep(value):
+    return value
+
+
+# D-Bus type -> converter to the matching Python type
+# Types not listed here are looked up once and added by _find_normaliser
+NORMALISERS = {
+    dbus.Dictionary: _normalise_dictionary,
+    dbus.Array: _normalise_array,
+    dbus.String: str,
+    dbus.ObjectPath: str,
+    dbus.Int64: int,
+    dbus.Int32: int,
+    dbus.Int16: int,
+    dbus.Byte: int,
+    dbus.UInt64: int,
+    dbus.UInt32: int,
+    dbus.UInt16: int,
+    dbus.Boolean: bool,
+    dbus.Double: float,
+}
+
+
+def _find_normaliser(value_type: type):
+    for dbus_type, normaliser in list(NORMALISERS.items()):
+        if issubclass(value_type, dbus_type):
+            break
+    else:
+        normaliser = _keep
+    NORMALISERS[value_type] = normaliser
+    return normaliser
+
+
+def normalise_value(value):
+    normaliser = NORMALISERS.get(type(value))
+    if normaliser is None:
+        normaliser = _find_normaliser(type(value))
+    return normaliser(value)
+
+
+# dbus-python connections are not safe to use from several threads at once,
+# so every call on the bus is handed over to the main loop thread, which runs
+# them one at a time. Blocks until the call is done.
+def run_in_main_loop(function, *args, **kwargs):
+    if threading.current_thread() is MAIN_LOOP_THREAD:
+        return function(*args, **kwargs)
+
+    done = threading.Event()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = function(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+        return False  # Only run once
+
+    GLib.idle_add(run)
+    done.wait()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+# Wraps a dbus.Interface so that every method called through it runs on the
+# main loop thread, and is timed and counted. Properties Get and Set calls
+# are labelled with the property they access.
+class InstrumentedInterface:
+    def __init__(self, interface: dbus.Interface):
+        self.interface = interface
+
+    def __getattr__(self, member: str):
+        method = getattr(self.interface, member)
+        interface_name = self.interface.dbus_interface
+
+        def call(*args, **kwargs):
+            property_name = ""
+            if interface_name == PROPERTIES_INTERFACE and member in ("Get", "Set"):
+                property_name = str(args[1])
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                return run_in_main_loop(method, *args, **kwargs)
+            except dbus.DBusException as e:
+                outcome = e.get_dbus_name() or "unknown"
+                raise
+            finally:
+                DBUS_DURATION.labels(interface_name, member, property_name).observe(
+                    time.perf_counter() - start
+                )
+                DBUS_CALLS.labels(interface_name, member, property_name, outcome).inc()
+
+        return call
+
+
+def start_main_loop():
+    # Signals are only delivered while a GLib main loop is running, so run
+    # one in a background thread. Must happen before the bus is created.
+    global MAIN_LOOP, MAIN_LOOP_THREAD
+    with _main_loop_lock:
+        if MAIN_LOOP is not None:
+            return
+        threads_init()
+        DBusGMainLoop(set_as_default=True)
+        MAIN_LOOP = GLib.MainLoop()
+        MAIN_LOOP_THREAD = threading.Thread(
+            target=MAIN_LOOP.run, name="dbus-main-loop", daemon=True
+        )
+        MAIN_LOOP_THREAD.start()
+
+
+# Calls on_added / on_removed with the bus name of every MPRIS player on the
+# session bus now, then as they appear and vanish. Both run on the main loop
+# thread.
+def watch_players(on_added, on_removed):
+    def on_name_owner_changed(name, old_owner, new_owner):
+        if not name.startswith(MPRIS_PREFIX):
+            return
+        if new_owner and not old_owner:
+            on_added(str(name))
+        elif old_owner and not new_owner:
+            on_removed(str(name))
+
+    def setup():
+        bus = dbus.SessionBus()
+        bus.add_signal_receiver(
+            on_name_owner_changed,
+            signal_name="NameOwnerChanged",
+            dbus_interface=DBUS_NAME,
+            bus_name=DBUS_NAME,
+            path=DBUS_PATH,
+        )
+        for name in bus.list_names():
+            if name.startswith(MPRIS_PREFIX):
+                on_added(str(name))
+
+    start_main_loop()
+    run_in_main_loop(setup)
+
+
+# Answers with a 503 right away while the player is not running, and binds to
+# the new instance of the player on the first call after it restarted
+def requires_player(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        unavailable = self._bind()
+        if unavailable is not None:
+            return unavailable
+        return func(self, *args, **kwargs)
+
+    return wrapper
 
 
 class DBusSpotifyAPIBackend(SpotifyAPIBackend):
-    def __init__(self):
+    # Seconds a cached property is trusted without having been refreshed by
+    # a PropertiesChanged signal. None trusts the cache forever.
+    CACHE_MAX_AGE = 60.0
+    # Seconds between two checks of the extrapolated position against the
+    # real one while playing
+    POSITION_CHECK_INTERVAL = 5
+    # Seconds before retrying to bind to a restarted player that did not
+    # answer yet, doubled on every failure up to MAX_BIND_DELAY
+    BIND_DELAY = 0.05
+    MAX_BIND_DELAY = 2.0
+
+    # bus_name: MPRIS player to control
+    def __init__(
+        self,
+        cache_max_age: float = CACHE_MAX_AGE,
+        position_check_interval: int = POSITION_CHECK_INTERVAL,
+        bus_name: str = BUS_NAME,
+    ):
+        super().__init__()
+        start_main_loop()
+
+        self.bus_name = bus_name
+        self.cache_max_age = cache_max_age
+        self.cache_lock = threading.Lock()
+        # property name -> (normalised value, time.monotonic() of last update)
+        self.player_properties = {}
+        # (position in µs, time.monotonic() it was read at, playback rate)
+        # Position is extrapolated from it since MPRIS never signals it
+        self.position_anchor = None
+        # (raw trackid, raw Metadata, normalised Metadata, normalised Metadata
+        # with "xesam:" / "mpris:" prefixes stripped) of the last track seen
+        self.metadata_memo = None
+        # Incremented whenever a cached property but Position changes
+        self.state_version = 0
+        # Unique name of the process owning bus_name, None while not running
+        self.owner = None
+        # Whether the interfaces point to the current owner
+        self.bound = False
+        self.bind_lock = threading.Lock()
+        self.bind_delay = self.BIND_DELAY
+        self.next_bind = 0.0
+
+        run_in_main_loop(self._setup_bus)
+        self.position_check = GLib.timeout_add_seconds(
+            position_check_interval, self._check_position_drift
+        )
+
+        # Warm the cache, so that capability checks (CanGoNext, CanGoPrevious,
+        # CanSeek, CanPlay, CanPause, CanControl) never wait on the bus
+        if self.bound:
+            try:
+                self._refresh_all_properties()
+            except dbus.DBusException:
+                pass
+
+    def _setup_bus(self):
         self.dbus = dbus.SessionBus()
-        self.proxy = self.dbus.get_object(
-            "org.mpris.MediaPlayer2.spotify", "/org/mpris/MediaPlayer2"
+        try:
+            self.owner = str(self.dbus.get_name_owner(self.bus_name))
+            self._connect()
+            self.bound = True
+        except dbus.DBusException:
+            pass  # Not running yet, bound once it shows up
+        self.owner_watch = self.dbus.watch_name_owner(
+            self.bus_name, self._on_name_owner_changed
         )
-        self.root_interface = dbus.Interface(
-            self.proxy, dbus_interface="org.mpris.MediaPlayer2"
+        self.signal_matches = [
+            self.dbus.add_signal_receiver(
+                self._on_properties_changed,
+                signal_name="PropertiesChanged",
+                dbus_interface=PROPERTIES_INTERFACE,
+                bus_name=self.bus_name,
+                path=OBJECT_PATH,
+            ),
+            self.dbus.add_signal_receiver(
+                self._on_seeked,
+                signal_name="Seeked",
+                dbus_interface=PLAYER_INTERFACE,
+                bus_name=self.bus_name,
+                path=OBJECT_PATH,
+            ),
+        ]
+
+    def _connect(self):
+        self.proxy = self.dbus.get_object(self.bus_name, OBJECT_PATH)
+        self.root_interface = InstrumentedInterface(
+            dbus.Interface(self.proxy, dbus_interface="org.mpris.MediaPlayer2")
         )
-        self.player_interface = dbus.Interface(
-            self.proxy, dbus_interface="org.mpris.MediaPlayer2.Player"
+        self.player_interface = InstrumentedInterface(
+            dbus.Interface(self.proxy, dbus_interface=PLAYER_INTERFACE)
         )
-        self.properties_interface = dbus.Interface(
-            self.proxy, dbus_interface="org.freedesktop.DBus.Properties"
+        self.properties_interface = InstrumentedInterface(
+            dbus.Interface(self.proxy, dbus_interface=PROPERTIES_INTERFACE)
         )
-        super().__init__()
 
-    def _get_normalised_value(self, value):
-        if isinstance(value, dbus.Dictionary):
-            return {
-                self._get_normalised_value(k): self._get_normalised_value(v)
-                for k, v in value.items()
-            }
-        elif isinstance(value, dbus.Array):
-            return [self._get_normalised_value(v) for v in value]
-        elif isinstance(value, (dbus.String, dbus.ObjectPath)):
-            return str(value)
-        elif isinstance(
-            value,
-            (
-                dbus.Int64,
-                dbus.Int32,
-                dbus.Int16,
-                dbus.Byte,
-                dbus.UInt64,
-                dbus.UInt32,
-                dbus.UInt16,
-            ),
+    # Runs on the main loop thread, so it must not wait on bind_lock
+    def _on_name_owner_changed(self, owner: str):
+        owner = str(owner) or None
+        if owner == self.owner:
+            return
+        self.owner = owner
+        self.bound = False
+        self.bind_delay = self.BIND_DELAY
+        self.next_bind = 0.0
+        self.invalidate_cache()
+
+    # Output: None once bound to the running player, else a 503 error
+    def _bind(self) -> dict:
+        if self.bound:
+            return None
+        with self.bind_lock:
+            if self.bound:
+                return None
+            if self.owner is None:
+                return {
+                    "status": False,
+                    "error": f"{self.bus_name} is not running",
+                    "http_status_code": 503,
+                }
+            now = time.monotonic()
+            if now < self.next_bind:
+                return {
+                    "status": False,
+                    "error": f"{self.bus_name} is starting",
+                    "http_status_code": 503,
+                }
+            owner = self.owner
+            try:
+                run_in_main_loop(self._connect)
+                self._refresh_all_properties()
+            except dbus.DBusException as e:
+                self.next_bind = now + self.bind_delay
+                self.bind_delay = min(self.bind_delay * 2, self.MAX_BIND_DELAY)
+                return {
+                    "status": False,
+                    "error": f"{self.bus_name} is starting: {e}",
+                    "http_status_code": 503,
+                }
+            # Restarted again meanwhile, the next call binds to the new one
+            self.bound = owner == self.owner
+            self.bind_delay = self.BIND_DELAY
+        return None
+
+    def _update_cache(self, properties: dict, invalidated: list = ()):
+        now = time.monotonic()
+        with self.cache_lock:
+            for name, value in properties.items():
+                previous = self.player_properties.get(name)
+                if name != "Position" and (previous is None or previous[0] != value):
+                    self.state_version += 1
+                self.player_properties[name] = (value, now)
+            for name in invalidated:
+                if self.player_properties.pop(name, None) is not None:
+                    self.state_version += 1
+
+    def _get_cached_property(self, name: str, default=None):
+        cached = self.player_properties.get(name)
+        return default if cached is None else cached[0]
+
+    def _get_trackid(self):
+        return self._get_cached_property("Metadata", {}).get("mpris:trackid")
+
+    # Must be called with cache_lock held
+    def _extrapolate_position(self):
+        if self.position_anchor is None:
+            return None
+        position, since, rate = self.position_anchor
+        position += int((time.monotonic() - since) * 1_000_000 * rate)
+        length = self._get_cached_property("Metadata", {}).get("mpris:length")
+        if length is not None:
+            position = min(position, length)
+        return max(position, 0)
+
+    def _set_position_anchor(self, position: int):
+        with self.cache_lock:
+            playing = self._get_cached_property("PlaybackStatus") == "Playing"
+            rate = self._get_cached_property("Rate", 1.0) if playing else 0.0
+            self.position_anchor = (position, time.monotonic(), rate)
+
+    def _on_properties_changed(self, interface, changed, invalidated):
+        if interface != PLAYER_INTERFACE:
+            return
+        changed = self._normalise_properties(changed)
+        with self.cache_lock:
+            position = self._extrapolate_position()
+            trackid = self._get_trackid()
+        self._update_cache(changed, [str(name) for name in invalidated])
+        self._publish_changes(changed)
+
+        if (
+            "Metadata" in changed
+            and changed["Metadata"].get("mpris:trackid") != trackid
         ):
-            return int(value)
-        elif isinstance(value, dbus.Boolean):
-            return bool(value)
-        elif isinstance(value, dbus.Double):
-            return float(value)
+            position = 0
+        elif "PlaybackStatus" not in changed and "Rate" not in changed:
+            return
+        if position is not None:
+            self._set_position_anchor(position)
+
+    def _publish_changes(self, changed: dict):
+        for name, value in changed.items():
+            if name not in PROPERTY_EVENTS:
+                continue
+            event, key = PROPERTY_EVENTS[name]
+            if name == "Metadata":
+                value = self._strip_metadata_keys(value)
+            self.events.publish(event, {key: value})
+
+    def _on_seeked(self, position):
+        self._set_position_anchor(int(position))
+        self.events.publish("seeked", {"position": int(position)})
+
+    def _check_position_drift(self):
+        with self.cache_lock:
+            anchor = self.position_anchor
+        if not self.bound:
+            return True
+        if anchor is None or anchor[2] != 0.0:
+            try:
+                self._refresh_position()
+            except dbus.DBusException:
+                pass
+        return True  # Keep the GLib timeout running
+
+    def _refresh_position(self) -> int:
+        position = self._get_player_property("Position", live=True)
+        self._set_position_anchor(position)
+        return position
+
+    def invalidate_cache(self):
+        with self.cache_lock:
+            self.player_properties.clear()
+            self.position_anchor = None
+            self.state_version += 1
+
+    # Reads a property of the Player interface from the signal driven cache.
+    # Falls back to a live D-Bus read when the property is not cached yet,
+    # when it is older than cache_max_age, or when live is True.
+    def _get_player_property(self, name: str, live: bool = False):
+        if not live:
+            with self.cache_lock:
+                cached = self.player_properties.get(name)
+            if cached is not None and (
+                self.cache_max_age is None
+                or time.monotonic() - cached[1] <= self.cache_max_age
+            ):
+                record_cache("dbus_properties", True)
+                return cached[0]
+            record_cache("dbus_properties", False)
+
+        value = self._normalise_properties(
+            {name: self.properties_interface.Get(PLAYER_INTERFACE, name)}
+        )[name]
+        self._update_cache({name: value})
         return value
 
-    def get_current_metadata(self) -> dict:
-        return self._get_normalised_value(
-            self.properties_interface.Get(
-                "org.mpris.MediaPlayer2.Player",
-                "Metadata",
-            )
+    # Reads every Player property in a single round trip and refreshes the
+    # whole cache with them
+    def _refresh_all_properties(self) -> dict:
+        properties = self._normalise_properties(
+            self.properties_interface.GetAll(PLAYER_INTERFACE)
+        )
+        self._update_cache(properties)
+        if "Position" in properties:
+            self._set_position_anchor(properties["Position"])
+        return properties
+
+    # Checks a Can* capability against the cache. A cached refusal may be
+    # stale, so it is confirmed with a live read before rejecting a command.
+    def _check_capability(self, name: str) -> bool:
+        return bool(
+            self._get_player_property(name)
+            or self._get_player_property(name, live=True)
         )
 
+    def _normalise_properties(self, properties: dict) -> dict:
+        return {
+            str(name): (
+                self._normalise_metadata(value)
+                if name == "Metadata"
+                else normalise_value(value)
+            )
+            for name, value in properties.items()
+        }
+
+    # Metadata is sent again with most PropertiesChanged signals but only
+    # changes with the track, so the last conversion is kept and reused as
+    # long as the raw value is the same.
+    def _normalise_metadata(self, raw: dict) -> dict:
+        trackid = raw.get("mpris:trackid")
+        memo = self.metadata_memo
+        if memo is not None and memo[0] == trackid and memo[1] == raw:
+            record_cache("dbus_metadata", True)
+            return memo[2]
+        record_cache("dbus_metadata", False)
+        metadata = normalise_value(raw)
+        stripped = {k.split(":")[-1]: v for k, v in metadata.items()}
+        self.metadata_memo = (trackid, raw, metadata, stripped)
+        return metadata
+
+    def _strip_metadata_keys(self, metadata: dict) -> dict:
+        memo = self.metadata_memo
+        if memo is not None and memo[2] is metadata:
+            return memo[3]
+        return {k.split(":")[-1]: v for k, v in metadata.items()}
+
+    def get_current_metadata(self) -> dict:
+        return self._get_player_property("Metadata")
+
+    @requires_player
     def play(self) -> dict:
         try:
             self.player_interface.Play()
@@ -73,6 +526,7 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def pause(self) -> dict:
         try:
             self.player_interface.Pause()
@@ -80,6 +534,7 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def toggle_play_pause(self) -> dict:
         try:
             self.player_interface.PlayPause()
@@ -87,6 +542,7 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def stop(self) -> dict:
         try:
             self.player_interface.Stop()
@@ -95,6 +551,7 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def show(self) -> dict:
         try:
             self.root_interface.Raise()
@@ -102,48 +559,41 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def skip(self) -> dict:
         try:
-            if not self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "CanGoNext",
-                )
-            ):
+            if not self._check_capability("CanGoNext"):
                 return {"status": False, "error": "can not next"}
             self.player_interface.Next()
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def prev(self) -> dict:
         try:
-            if not self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "CanGoPrevious",
-                )
-            ):
+            if not self._check_capability("CanGoPrevious"):
                 return {"status": False, "error": "can not previous"}
             self.player_interface.Previous()
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True}
 
+    @requires_player
     def seek(self, seconds: int) -> dict:
         try:
-            if not self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "CanSeek",
-                )
-            ):
+            if not self._check_capability("CanSeek"):
                 return {"status": False, "error": "can not seek"}
             self.player_interface.Seek(dbus.Int64(seconds * 1_000_000))
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
+        with self.cache_lock:
+            position = self._extrapolate_position()
+        if position is not None:
+            self._set_position_anchor(max(position + seconds * 1_000_000, 0))
         return {"status": True}
 
+    @requires_player
     def set_position(self, seconds: int) -> dict:
         try:
             metadata = self.get_current_metadata()
@@ -154,91 +604,93 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             )
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
+        self._set_position_anchor(seconds * 1_000_000)
         return {"status": True}
 
+    @requires_player
     def get_position(self) -> dict:
+        with self.cache_lock:
+            position = self._extrapolate_position()
+        if position is not None:
+            return {"status": True, "position": position}
         try:
-            position = self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "Position",
-                )
-            )
+            position = self._refresh_position()
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True, "position": position}
 
+    @requires_player
     def set_loop(self, loop_status: str) -> dict:
         if loop_status is None:
             return {"status": False, "error": "missing input value"}
         try:
             self.properties_interface.Set(
-                "org.mpris.MediaPlayer2.Player",
+                PLAYER_INTERFACE,
                 "LoopStatus",
                 dbus.String(loop_status),  # "None", "Playlist" or "Track"
             )
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
+        # The getters read the cache, don't let them answer the old value
+        # until PropertiesChanged is handled
+        self._update_cache({"LoopStatus": str(loop_status)})
         return {"status": True}
 
+    @requires_player
     def get_loop(self) -> dict:
         try:
-            loop = self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "LoopStatus",
-                )
-            )
+            loop = self._get_player_property("LoopStatus")
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True, "loop": loop}
 
+    @requires_player
     def set_shuffle(self, shuffle: bool) -> dict:
         try:
             self.properties_interface.Set(
-                "org.mpris.MediaPlayer2.Player",
+                PLAYER_INTERFACE,
                 "Shuffle",
                 dbus.Boolean(shuffle),
             )
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
+        # The getters read the cache, don't let them answer the old value
+        # until PropertiesChanged is handled
+        self._update_cache({"Shuffle": bool(shuffle)})
         return {"status": True}
 
+    @requires_player
     def get_shuffle(self) -> dict:
         try:
-            shuffle = self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "Shuffle",
-                )
-            )
+            shuffle = self._get_player_property("Shuffle")
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True, "shuffle": shuffle}
 
+    @requires_player
     def set_volume(self, volume: float) -> dict:
         try:
             self.properties_interface.Set(
-                "org.mpris.MediaPlayer2.Player",
+                PLAYER_INTERFACE,
                 "Volume",
                 dbus.Double(volume),
             )
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
+        # The getters read the cache, don't let them answer the old value
+        # until PropertiesChanged is handled
+        self._update_cache({"Volume": float(volume)})
         return {"status": True}
 
+    @requires_player
     def get_volume(self) -> dict:
         try:
-            volume = self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "Volume",
-                )
-            )
+            volume = self._get_player_property("Volume")
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True, "volume": volume}
 
+    @requires_player
     def get_current_song(self) -> dict:
         try:
             metadata = self.get_current_metadata()
@@ -246,36 +698,61 @@ class DBusSpotifyAPIBackend(SpotifyAPIBackend):
             return {"status": False, "error": str(e)}
         return {
             "status": True,
-            "current_song": {k.split(":")[-1]: v for k, v in metadata.items()},
+            "current_song": self._strip_metadata_keys(metadata),
         }
 
+    @requires_player
     def get_playing(self) -> dict:
         try:
-            playing = self._get_normalised_value(
-                self.properties_interface.Get(
-                    "org.mpris.MediaPlayer2.Player",
-                    "PlaybackStatus",
-                )
-            )
+            playing = self._get_player_property("PlaybackStatus")
         except dbus.DBusException as e:
             return {"status": False, "error": str(e)}
         return {"status": True, "playing": playing}
 
-    def resync(self) -> dict:
+    @requires_player
+    def get_state(self, fields: list = None) -> dict:
+        if fields:
+            unknown = [field for field in fields if field not in STATE_PROPERTIES]
+            if unknown:
+                return {
+                    "status": False,
+                    "error": f"unknown state fields: {', '.join(unknown)}",
+                    "http_status_code": 400,
+                }
         try:
-            self.dbus = dbus.SessionBus()
-            self.proxy = self.dbus.get_object(
-                "org.mpris.MediaPlayer2.spotify", "/org/mpris/MediaPlayer2"
-            )
-            self.root_interface = dbus.Interface(
-                self.proxy, dbus_interface="org.mpris.MediaPlayer2"
-            )
-            self.player_interface = dbus.Interface(
-                self.proxy, dbus_interface="org.mpris.MediaPlayer2.Player"
-            )
-            self.properties_interface = dbus.Interface(
-                self.proxy, dbus_interface="org.freedesktop.DBus.Properties"
-            )
-        except Exception as e:
-            return {"status": False, "error": f"{e.__class__}: {e}"}
+            properties = self._refresh_all_properties()
+        except dbus.DBusException as e:
+            return {"status": False, "error": str(e)}
+
+        state = {
+            key: properties.get(name)
+            for key, name in STATE_PROPERTIES.items()
+            if not fields or key in fields
+        }
+        if state.get("current_song") is not None:
+            state["current_song"] = self._strip_metadata_keys(state["current_song"])
+        return {"status": True, "state": state}
+
+    def get_state_tag(self) -> str:
+        with self.cache_lock:
+            return f"{self._get_trackid()}:{self.state_version}"
+
+    def close(self):
+        def remove():
+            self.owner_watch.cancel()
+            for match in self.signal_matches:
+                match.remove()
+            GLib.source_remove(self.position_check)
+
+        run_in_main_loop(remove)
+
+    # Not needed anymore, the backend binds to a restarted player by itself.
+    # Forces a rebind and a refresh of the whole cache
+    def resync(self) -> dict:
+        self.bound = False
+        self.next_bind = 0.0
+        self.invalidate_cache()
+        unavailable = self._bind()
+        if unavailable is not None:
+            return unavailable
         return {"status": True}
@@ -0,0 +1,165 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import threading
+import time
+
+from ..events import EventBus
+from .backend import SpotifyAPIBackend
+
+
+# Event bus of the proxy. Subscribers wait for the events of the backend, so
+# they start building it
+class _BuildingEventBus(EventBus):
+    def __init__(self, on_subscribe):
+        super().__init__()
+        self.on_subscribe = on_subscribe
+
+    def subscribe(self):
+        subscription = super().subscribe()
+        self.on_subscribe()
+        return subscription
+
+
+# Stands for a backend built on first use, so that the server starts without
+# waiting on it. Calls made during the build wait up to BUILD_WAIT seconds for
+# it. Until the backend is built, and while building it fails, every method
+# answers with a 503. A failed build is retried on the next call RETRY_DELAY
+# seconds later.
+class LazyBackend(SpotifyAPIBackend):
+    RETRY_DELAY = 1.0
+    BUILD_WAIT = 0.5
+
+    def __init__(self, factory):
+        super().__init__()
+        self.events = _BuildingEventBus(self._build_in_background)
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.backend = None
+        self.error = None
+        self.next_try = 0.0
+
+    # Output: "pending", "ready" or "failed"
+    def get_build_state(self) -> str:
+        if self.backend is not None:
+            return "ready"
+        return "pending" if self.error is None else "failed"
+
+    def _get(self):
+        if self.backend is not None:
+            return self.backend
+        # Slow builds (the player is not running...) don't hold calls longer
+        if not self.lock.acquire(timeout=self.BUILD_WAIT):
+            return None
+        try:
+            if self.backend is None and time.monotonic() >= self.next_try:
+                try:
+                    backend = self.factory()
+                except Exception as e:
+                    self.error = f"{e.__class__.__name__}: {e}"
+                    self.next_try = time.monotonic() + self.RETRY_DELAY
+                    return None
+                # Subscribers may already listen to the events of the proxy
+                backend.events = self.events
+                self.error = None
+                self.backend = backend
+            return self.backend
+        finally:
+            self.lock.release()
+
+    def _build_in_background(self):
+        if self.backend is None:
+            threading.Thread(
+                target=self._get, name="backend-build", daemon=True
+            ).start()
+
+    def _call(self, method: str, *args, **kwargs) -> dict:
+        backend = self._get()
+        if backend is None:
+            return {
+                "status": False,
+                "error": f"backend unavailable: {self.error or 'starting'}",
+                "http_status_code": 503,
+            }
+        return getattr(backend, method)(*args, **kwargs)
+
+    def play(self) -> dict:
+        return self._call("play")
+
+    def pause(self) -> dict:
+        return self._call("pause")
+
+    def toggle_play_pause(self) -> dict:
+        return self._call("toggle_play_pause")
+
+    def stop(self) -> dict:
+        return self._call("stop")
+
+    def show(self) -> dict:
+        return self._call("show")
+
+    def skip(self) -> dict:
+        return self._call("skip")
+
+    def prev(self) -> dict:
+        return self._call("prev")
+
+    def seek(self, seconds: int) -> dict:
+        return self._call("seek", seconds)
+
+    def set_position(self, seconds: int) -> dict:
+        return self._call("set_position", seconds)
+
+    def get_position(self) -> dict:
+        return self._call("get_position")
+
+    def set_loop(self, loop: str) -> dict:
+        return self._call("set_loop", loop)
+
+    def get_loop(self) -> dict:
+        return self._call("get_loop")
+
+    def set_shuffle(self, shuffle: bool) -> dict:
+        return self._call("set_shuffle", shuffle)
+
+    def get_shuffle(self) -> dict:
+        return self._call("get_shuffle")
+
+    def set_volume(self, volume: float) -> dict:
+        return self._call("set_volume", volume)
+
+    def get_volume(self) -> dict:
+        return self._call("get_volume")
+
+    def get_current_song(self) -> dict:
+        return self._call("get_current_song")
+
+    def get_playing(self) -> dict:
+        return self._call("get_playing")
+
+    def get_state(self, fields: list = None) -> dict:
+        return self._call("get_state", fields)
+
+    def get_state_tag(self) -> str:
+        backend = self._get()
+        return backend.get_state_tag() if backend is not None else None
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+    def resync(self) -> dict:
+        return self._call("resync")
+
+    # Backend specific attributes, once built
+    def __getattr__(self, name: str):
+        backend = self.__dict__.get("backend")
+        if backend is None:
+            raise AttributeError(name)
+        return getattr(backend, name)
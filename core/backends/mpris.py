@@ -0,0 +1,18 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# MPRIS names, kept apart from dbus_api so that they can be used without
+# importing dbus
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+BUS_NAME = MPRIS_PREFIX + "spotify"
+OBJECT_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+DBUS_NAME = "org.freedesktop.DBus"
+DBUS_PATH = "/org/freedesktop/DBus"
@@ -0,0 +1,307 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import functools
+import random
+import threading
+import time
+
+from .backend import SpotifyAPIBackend
+
+LOOP_VALUES = ("None", "Playlist", "Track")
+
+
+# A latency distribution, in milliseconds, is one of:
+#   ("constant", ms)
+#   ("uniform", min_ms, max_ms)
+#   ("normal", mean_ms, deviation_ms)
+#   ("lognormal", median_ms, sigma)
+#   ("exponential", mean_ms)
+def _sample_latency(rng: random.Random, distribution) -> float:
+    kind, *params = distribution
+    if kind == "constant":
+        ms = params[0]
+    elif kind == "uniform":
+        ms = rng.uniform(params[0], params[1])
+    elif kind == "normal":
+        ms = rng.gauss(params[0], params[1])
+    elif kind == "lognormal":
+        ms = params[0] * rng.lognormvariate(0, params[1])
+    elif kind == "exponential":
+        ms = rng.expovariate(1 / params[0]) if params[0] > 0 else 0
+    else:
+        raise ValueError(f'unknown latency distribution "{kind}"')
+    return max(ms, 0) / 1000
+
+
+def simulated(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        latency, failed = self._draw(func.__name__)
+        if latency:
+            time.sleep(latency)
+        if failed:
+            return {"status": False, "error": f"simulated {func.__name__} failure"}
+        with self.lock:
+            self._advance()
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SimulatedSpotifyAPIBackend(SpotifyAPIBackend):
+    # latency: {method name or "default": latency distribution}
+    # error_rate: {method name or "default": probability of failing}
+    # tracks: number of tracks of the simulated playlist
+    # track_seconds: (shortest, longest) track length
+    # seed: seed of the random generator, for reproducible runs
+    # art_url: cover url of the tracks, formatted with i the track number
+    def __init__(
+        self,
+        latency: dict = None,
+        error_rate: dict = None,
+        tracks: int = 50,
+        track_seconds: tuple = (120, 300),
+        seed: int = None,
+        art_url: str = "https://i.scdn.co/image/simulated{i:031d}",
+    ):
+        super().__init__()
+        self.latency = {"default": ("constant", 0), **(latency or {})}
+        self.error_rate = {"default": 0.0, **(error_rate or {})}
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.lock = threading.RLock()
+
+        self.tracks = [
+            self._make_track(i, track_seconds, art_url) for i in range(tracks)
+        ]
+        self.order = list(range(tracks))
+        self.index = 0
+        self.playing = "Paused"
+        # (position in µs, time.monotonic() it was set at)
+        self.position_anchor = (0, time.monotonic())
+        self.volume = 1.0
+        self.loop = "None"
+        self.shuffle = False
+        # Incremented on every change but position ones
+        self.state_version = 0
+
+    def _make_track(self, i: int, track_seconds: tuple, art_url: str) -> dict:
+        return {
+            "trackid": f"/com/spotify/track/simulated{i:013d}",
+            "length": self.rng.randint(*track_seconds) * 1_000_000,
+            "artUrl": art_url.format(i=i),
+            "album": f"Album {i // 10}",
+            "albumArtist": [f"Artist {i // 10}"],
+            "artist": [f"Artist {i // 10}"],
+            "autoRating": round(self.rng.random(), 2),
+            "discNumber": 1,
+            "title": f"Track {i}",
+            "trackNumber": i % 10 + 1,
+            "url": f"https://open.spotify.com/track/simulated{i:013d}",
+        }
+
+    def _draw(self, method: str) -> tuple:
+        distribution = self.latency.get(method, self.latency["default"])
+        error_rate = self.error_rate.get(method, self.error_rate["default"])
+        with self.rng_lock:
+            return (
+                _sample_latency(self.rng, distribution),
+                self.rng.random() < error_rate,
+            )
+
+    def _publish(self, event: str, data: dict):
+        if event != "seeked":
+            self.state_version += 1
+        self.events.publish(event, data)
+
+    def _current_track(self) -> dict:
+        return self.tracks[self.order[self.index]]
+
+    def _position(self) -> int:
+        position, since = self.position_anchor
+        if self.playing == "Playing":
+            position += int((time.monotonic() - since) * 1_000_000)
+        return position
+
+    def _set_position(self, position: int):
+        length = self._current_track()["length"]
+        self.position_anchor = (max(0, min(position, length)), time.monotonic())
+
+    def _set_playing(self, playing: str):
+        if playing != self.playing:
+            self._set_position(self._position())
+            self.playing = playing
+            self._publish("playing", {"playing": playing})
+
+    def _change_track(self, index: int):
+        self.index = index
+        self.position_anchor = (0, time.monotonic())
+        self._publish("track", {"current_song": dict(self._current_track())})
+
+    # Moves on to the next tracks for the time played since the last call
+    def _advance(self):
+        while self.playing == "Playing":
+            length = self._current_track()["length"]
+            position, since = self.position_anchor
+            overflow = self._position() - length
+            if overflow < 0:
+                return
+            ended_at = since + (length - position) / 1_000_000
+            if self.loop == "Track":
+                next_index = self.index
+            elif self.index + 1 < len(self.order):
+                next_index = self.index + 1
+            elif self.loop == "Playlist":
+                next_index = 0
+            else:
+                self.position_anchor = (length, ended_at)
+                self.playing = "Stopped"
+                self._publish("playing", {"playing": "Stopped"})
+                return
+            self._change_track(next_index)
+            self.position_anchor = (0, ended_at)
+
+    @simulated
+    def play(self) -> dict:
+        self._set_playing("Playing")
+        return {"status": True}
+
+    @simulated
+    def pause(self) -> dict:
+        self._set_playing("Paused")
+        return {"status": True}
+
+    @simulated
+    def toggle_play_pause(self) -> dict:
+        self._set_playing("Paused" if self.playing == "Playing" else "Playing")
+        return {"status": True}
+
+    @simulated
+    def stop(self) -> dict:
+        self._set_playing("Stopped")
+        return {"status": True}
+
+    @simulated
+    def show(self) -> dict:
+        return {"status": True}
+
+    @simulated
+    def skip(self) -> dict:
+        if self.index + 1 < len(self.order):
+            self._change_track(self.index + 1)
+        elif self.loop == "Playlist":
+            self._change_track(0)
+        else:
+            return {"status": False, "error": "can not next"}
+        return {"status": True}
+
+    @simulated
+    def prev(self) -> dict:
+        if self.index > 0:
+            self._change_track(self.index - 1)
+        elif self.loop == "Playlist":
+            self._change_track(len(self.order) - 1)
+        else:
+            return {"status": False, "error": "can not previous"}
+        return {"status": True}
+
+    @simulated
+    def seek(self, seconds: int) -> dict:
+        self._set_position(self._position() + seconds * 1_000_000)
+        self._publish("seeked", {"position": self._position()})
+        return {"status": True}
+
+    @simulated
+    def set_position(self, seconds: int) -> dict:
+        self._set_position(seconds * 1_000_000)
+        self._publish("seeked", {"position": self._position()})
+        return {"status": True}
+
+    @simulated
+    def get_position(self) -> dict:
+        return {"status": True, "position": self._position()}
+
+    @simulated
+    def set_loop(self, loop_status: str) -> dict:
+        if loop_status not in LOOP_VALUES:
+            return {"status": False, "error": "missing input value"}
+        if loop_status != self.loop:
+            self.loop = loop_status
+            self._publish("loop", {"loop": loop_status})
+        return {"status": True}
+
+    @simulated
+    def get_loop(self) -> dict:
+        return {"status": True, "loop": self.loop}
+
+    @simulated
+    def set_shuffle(self, shuffle: bool) -> dict:
+        if shuffle != self.shuffle:
+            current = self.order[self.index]
+            self.order = list(range(len(self.tracks)))
+            if shuffle:
+                self.rng.shuffle(self.order)
+            self.index = self.order.index(current)
+            self.shuffle = shuffle
+            self._publish("shuffle", {"shuffle": shuffle})
+        return {"status": True}
+
+    @simulated
+    def get_shuffle(self) -> dict:
+        return {"status": True, "shuffle": self.shuffle}
+
+    @simulated
+    def set_volume(self, volume: float) -> dict:
+        if volume != self.volume:
+            self.volume = volume
+            self._publish("volume", {"volume": volume})
+        return {"status": True}
+
+    @simulated
+    def get_volume(self) -> dict:
+        return {"status": True, "volume": self.volume}
+
+    @simulated
+    def get_current_song(self) -> dict:
+        return {"status": True, "current_song": dict(self._current_track())}
+
+    @simulated
+    def get_playing(self) -> dict:
+        return {"status": True, "playing": self.playing}
+
+    @simulated
+    def get_state(self, fields: list = None) -> dict:
+        state = {
+            "position": self._position(),
+            "loop": self.loop,
+            "shuffle": self.shuffle,
+            "volume": self.volume,
+            "playing": self.playing,
+            "current_song": dict(self._current_track()),
+        }
+        if fields:
+            unknown = [field for field in fields if field not in state]
+            if unknown:
+                return {
+                    "status": False,
+                    "error": f"unknown state fields: {', '.join(unknown)}",
+                    "http_status_code": 400,
+                }
+            state = {key: value for key, value in state.items() if key in fields}
+        return {"status": True, "state": state}
+
+    def get_state_tag(self) -> str:
+        with self.lock:
+            self._advance()
+            return f"{self._current_track()['trackid']}:{self.state_version}"
+
+    @simulated
+    def resync(self) -> dict:
+        return {"status": True}
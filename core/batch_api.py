@@ -0,0 +1,111 @@
+from flask import g
+from flask_restx import Namespace, Resource, fields
+
+from .commands import COMMANDS, run_command
+from .ratelimit import command_class
+from .web_server_utils import (basic_auth_required, check_rate_limit,
+                               error_model, formated_output, get_backend,
+                               rate_limited_output)
+from .validation import CompiledModel
+
+batch_api = Namespace(
+    "Batch API",
+    description="Run many backend operations in a single request",
+    path="/api/batch",
+)
+
+
+operation_model = batch_api.model(
+    "Operation",
+    {
+        "op": fields.String(
+            required=True,
+            description="Backend operation to run",
+            enum=list(COMMANDS),
+        ),
+        "args": fields.Raw(
+            description='Arguments of the operation, like {"volume": 0.3}',
+        ),
+    },
+)
+
+batch_model = batch_api.model(
+    "Batch",
+    {
+        "operations": fields.List(
+            fields.Nested(operation_model),
+            required=True,
+            description="Operations to run, in order",
+        ),
+        "stop_on_error": fields.Boolean(
+            description="Do not run the remaining operations after a failure",
+            default=False,
+        ),
+    },
+)
+
+batch_result_model = batch_api.model(
+    "BatchResult",
+    {
+        "status": fields.Boolean(
+            description="True if every operation succeeded, see the status of \
+each result otherwise",
+        ),
+        "results": fields.List(
+            fields.Raw,
+            description="Output of each operation that ran, in order",
+        ),
+    },
+)
+
+
+def operation_list(operations: list) -> list:
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise ValueError(f"{operation!r} is not an object")
+    return operations
+
+
+batch_validator = CompiledModel(batch_model, {"operations": operation_list})
+
+
+# Output: the result of one operation of the batch
+def run_operation(operation: dict) -> dict:
+    # Every operation counts against the limits, like WebSocket commands
+    retry_after = check_rate_limit(g.user, command_class(operation.get("op")))
+    if retry_after:
+        return rate_limited_output(retry_after)
+    return run_command(get_backend(), operation.get("op"), operation.get("args"))
+
+
+@batch_api.route("")
+class Batch(Resource):
+    @batch_api.doc(security="basic")
+    @batch_api.response(200, "Ok", batch_result_model)
+    @batch_api.response(400, "Malformed batch", error_model)
+    @batch_api.response(500, "Error", error_model)
+    @batch_api.expect(batch_model)
+    @basic_auth_required
+    def post(self):
+        if get_backend() is None:
+            return {"status": False, "error": "backend is None"}
+
+        args = batch_validator.parse_request()
+
+        results = []
+        for operation in args.get("operations"):
+            result = run_operation(operation)
+            result.pop("http_status_code", None)
+            results.append(result)
+            if not result.get("status") and args.get("stop_on_error"):
+                break
+
+        # The batch itself went through even if some operations failed, their
+        # errors are in the results
+        return formated_output(
+            {
+                "status": all(result.get("status") for result in results),
+                "results": results,
+                "http_status_code": 200,
+            }
+        )
@@ -0,0 +1,93 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import sys
+import threading
+import time
+
+from .players import get_player
+from .web_server_utils import get_backend
+
+COMMAND_RATE = None
+# player id (None for the default one) -> CommandQueue
+COMMAND_QUEUES = {}
+_lock = threading.Lock()
+
+
+# Holds the latest seek / position / volume commands and applies them to the
+# backend at most max_rate times per second. Commands waiting to be applied
+# are merged: relative seeks add up, absolute positions and volumes replace
+# what is pending.
+class CommandQueue:
+    def __init__(self, max_rate: float, player: str = None):
+        self.interval = 1 / max_rate
+        self.player = player
+        self.condition = threading.Condition()
+        # "position": ("seek", seconds) or ("set_position", seconds)
+        # "volume": ("set_volume", volume)
+        self.pending = {}
+        threading.Thread(target=self._run, name="command-queue", daemon=True).start()
+
+    def _submit(self, key: str, command: tuple) -> dict:
+        with self.condition:
+            self.pending[key] = command
+            self.condition.notify()
+        return {"status": True, "queued": True, "http_status_code": 202}
+
+    def seek(self, seconds: int) -> dict:
+        with self.condition:
+            kind, pending = self.pending.get("position", ("seek", 0))
+            return self._submit("position", (kind, pending + seconds))
+
+    def set_position(self, seconds: int) -> dict:
+        return self._submit("position", ("set_position", seconds))
+
+    def set_volume(self, volume: float) -> dict:
+        return self._submit("volume", ("set_volume", volume))
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                commands = list(self.pending.values())
+                self.pending.clear()
+
+            for method, value in commands:
+                if method == "seek" and value == 0:
+                    continue
+                backend = get_backend(self.player)
+                if backend is None:
+                    continue  # Player gone
+                # Failures are counted by the backend metrics, the queue must
+                # keep running for the next commands
+                try:
+                    getattr(backend, method)(value)
+                except Exception as e:
+                    print(f"Queued {method} failed: {e!r}", file=sys.stderr)
+            time.sleep(self.interval)
+
+
+def set_command_queue(max_rate: float = None):
+    global COMMAND_RATE
+    with _lock:
+        COMMAND_RATE = max_rate
+        COMMAND_QUEUES.clear()
+
+
+# Output: the queue of the player the current request is routed to, started
+# on first use, or None if commands are not queued
+def get_command_queue():
+    if not COMMAND_RATE:
+        return None
+    player = get_player()
+    with _lock:
+        if player not in COMMAND_QUEUES:
+            COMMAND_QUEUES[player] = CommandQueue(COMMAND_RATE, player)
+        return COMMAND_QUEUES[player]
@@ -0,0 +1,98 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+from .backends import SpotifyAPIBackend
+from .command_queue import get_command_queue
+from .ramp import cancel_volume_ramp
+from .player_api import seek_validator
+from .status_api import (loop_validator, position_validator,
+                         shuffle_validator, state_validator, volume_validator)
+
+# Commands that can be sent without going through the REST routes, as
+# command name -> CompiledModel of its arguments, None when it takes none.
+# The arguments are validated like the body of the matching REST route.
+# The command name is the name of the SpotifyAPIBackend method it calls.
+COMMANDS = {
+    "play": None,
+    "pause": None,
+    "toggle_play_pause": None,
+    "stop": None,
+    "show": None,
+    "skip": None,
+    "prev": None,
+    "seek": seek_validator,
+    "set_position": position_validator,
+    "get_position": None,
+    "set_loop": loop_validator,
+    "get_loop": None,
+    "set_shuffle": shuffle_validator,
+    "get_shuffle": None,
+    "set_volume": volume_validator,
+    "get_volume": None,
+    "get_current_song": None,
+    "get_playing": None,
+    "get_state": state_validator,
+    "resync": None,
+}
+
+
+# Commands the command queue can take, when it is enabled
+QUEUEABLE_COMMANDS = ("seek", "set_position", "set_volume")
+
+
+# Input: command name, {argument name: value}, whether seek / position /
+#        volume commands may go through the command queue
+# Output: the backend output, with "http_status_code" set on invalid input
+def run_command(
+    backend: SpotifyAPIBackend, command: str, args: dict = None, queue: bool = False
+) -> dict:
+    if backend is None:
+        return {"status": False, "error": "backend is None"}
+    if command not in COMMANDS:
+        return {
+            "status": False,
+            "error": f'unknown command "{command}"',
+            "http_status_code": 400,
+        }
+    if args is None:
+        args = {}
+    if not isinstance(args, dict):
+        return {
+            "status": False,
+            "error": "args must be an object",
+            "http_status_code": 400,
+        }
+
+    validator = COMMANDS[command]
+    names = validator.names() if validator is not None else ()
+    unknown = [name for name in args if name not in names]
+    if unknown:
+        return {
+            "status": False,
+            "error": f"unknown arguments: {', '.join(unknown)}",
+            "http_status_code": 400,
+        }
+    parsed = {}
+    if validator is not None:
+        try:
+            parsed = validator.parse(args)
+        except ValueError as e:
+            return {
+                "status": False,
+                "error": "; ".join(
+                    f"{name}: {error}" for name, error in e.args[0].items()
+                ),
+                "http_status_code": 400,
+            }
+
+    if command == "set_volume":
+        cancel_volume_ramp()  # An explicit volume wins over a running fade
+    if queue and command in QUEUEABLE_COMMANDS and get_command_queue() is not None:
+        return getattr(get_command_queue(), command)(**parsed)
+    return getattr(backend, command)(**parsed)
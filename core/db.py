@@ -7,13 +7,47 @@
 ##############
 
 
+import hashlib
+import hmac
+import os
+
+PASSWORD_HASH_ITERATIONS = 100_000
+
+# username -> (salt, pbkdf2 hash of the password)
 VALID_USERS = {}
+# Incremented every time the users change, so that anything derived from
+# them can notice it is outdated
+USERS_VERSION = 0
+
+# Compared against when the username does not exist, so that unknown users
+# take as long to reject as wrong passwords
+_UNKNOWN_USER = (b"\0" * 16, b"")
+
+
+def _hash_password(password: str, salt: bytes) -> bytes:
+    return hashlib.pbkdf2_hmac(
+        "sha256", password.encode("utf-8"), salt, PASSWORD_HASH_ITERATIONS
+    )
 
 
 def get_valid_users():
     return VALID_USERS
 
 
+def get_users_version():
+    return USERS_VERSION
+
+
 def set_valid_users(valid_users: dict):
-    global VALID_USERS
-    VALID_USERS = valid_users
+    global VALID_USERS, USERS_VERSION
+    hashed_users = {}
+    for username, password in valid_users.items():
+        salt = os.urandom(16)
+        hashed_users[username] = (salt, _hash_password(password, salt))
+    VALID_USERS = hashed_users
+    USERS_VERSION += 1
+
+
+def check_password(username: str, password: str) -> bool:
+    salt, expected = VALID_USERS.get(username, _UNKNOWN_USER)
+    return hmac.compare_digest(_hash_password(password, salt), expected)
@@ -0,0 +1,67 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import threading
+from collections import OrderedDict
+
+
+class Subscription:
+    # Events waiting to be read are keyed by their type, so a new event
+    # replaces an unread one of the same type instead of queueing behind it,
+    # and the replaced one is counted as dropped. At most one event per type
+    # is pending, so a slow reader never piles them up.
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()
+        self.dropped = 0
+
+    def put(self, event: str, data: dict):
+        with self.condition:
+            if event in self.pending:
+                del self.pending[event]
+                self.dropped += 1
+            self.pending[event] = data
+            self.condition.notify()
+
+    # Returns (event, data), or None if nothing happened within timeout
+    def get(self, timeout: float = None):
+        with self.condition:
+            if not self.pending:
+                self.condition.wait(timeout)
+            if not self.pending:
+                return None
+            return self.pending.popitem(last=False)
+
+    def pop_dropped(self) -> int:
+        with self.condition:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBus:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription()
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    # Never blocks, so it is safe to call from a signal handler
+    def publish(self, event: str, data: dict):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event, data)
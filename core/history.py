@@ -0,0 +1,293 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import bisect
+import fcntl
+import json
+import os
+import struct
+import threading
+import time
+
+HISTORY = None
+
+# A checkpoint is written to the index every CHECKPOINT_INTERVAL records
+CHECKPOINT_INTERVAL = 256
+# Index entry: (time of the first record of the block, its offset in the log)
+CHECKPOINT = struct.Struct("<dQ")
+# Metadata kept for each played track
+RECORDED_KEYS = ("trackid", "title", "artist", "album", "length")
+
+
+# Append-only log of the tracks played, one JSON line per track change, next
+# to an index of checkpoints splitting it into blocks of CHECKPOINT_INTERVAL
+# records. Queries only keep the small index in memory, bisect it for the
+# blocks matching their time range and read these from disk.
+# Only one process records: the first one to lock the log. The others (more
+# workers of a WSGI server) only answer queries, following the files.
+class History:
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock = threading.Lock()
+        # Checkpoint times and offsets, in log order
+        self.times = []
+        self.offsets = []
+        self.size = 0
+        self.count = 0
+        self.last_trackid = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.log = open(path, "ab+")
+        try:
+            fcntl.flock(self.log, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.writer = True
+        except BlockingIOError:
+            self.writer = False
+        if self.writer:
+            self._recover()
+            self.index = open(self.index_path, "ab")
+        else:
+            self.index = None
+            self._refresh()
+
+    # Drops a record torn by a crash, then loads the index and completes it
+    # from the log, from its last valid checkpoint on
+    def _recover(self):
+        size = self.log.seek(0, os.SEEK_END)
+        if size:
+            self.log.seek(max(size - 64 * 1024, 0))
+            tail = self.log.read()
+            if not tail.endswith(b"\n"):
+                size -= len(tail) - (tail.rfind(b"\n") + 1)
+                self.log.truncate(size)
+
+        checkpoints = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as index:
+                data = index.read()
+            data = data[: len(data) - len(data) % CHECKPOINT.size]
+            checkpoints = [
+                entry for entry in CHECKPOINT.iter_unpack(data) if entry[1] < size
+            ]
+        if not checkpoints or checkpoints[0][1] != 0:
+            checkpoints = []
+
+        # The last block is scanned again, it may lack checkpoints after it
+        offset = checkpoints.pop()[1] if checkpoints else 0
+        self.count = len(checkpoints) * CHECKPOINT_INTERVAL
+        self.log.seek(offset)
+        for line in self.log:
+            record = json.loads(line)
+            if self.count % CHECKPOINT_INTERVAL == 0:
+                checkpoints.append((record["t"], offset))
+            offset += len(line)
+            self.count += 1
+            self.last_trackid = record.get("trackid")
+        with open(self.index_path, "wb") as index:
+            for checkpoint in checkpoints:
+                index.write(CHECKPOINT.pack(*checkpoint))
+
+        self.times = [checkpoint[0] for checkpoint in checkpoints]
+        self.offsets = [checkpoint[1] for checkpoint in checkpoints]
+        self.size = size
+
+    # Readers only see the complete records and the checkpoints before them
+    def _refresh(self):
+        size = os.path.getsize(self.path)
+        if size > self.size:
+            start = max(size - 64 * 1024, self.size)
+            with open(self.path, "rb") as log:
+                log.seek(start)
+                tail = log.read(size - start)
+            if b"\n" in tail:
+                self.size = start + tail.rfind(b"\n") + 1
+
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as index:
+            index.seek(len(self.offsets) * CHECKPOINT.size)
+            data = index.read()
+        data = data[: len(data) - len(data) % CHECKPOINT.size]
+        for checkpoint_time, offset in CHECKPOINT.iter_unpack(data):
+            if offset >= self.size:
+                break  # Its record is not written yet
+            self.times.append(checkpoint_time)
+            self.offsets.append(offset)
+
+    def record(self, song: dict, played_at: float = None):
+        if not self.writer:
+            return
+        trackid = song.get("trackid")
+        with self.lock:
+            if not trackid or trackid == self.last_trackid:
+                return  # Metadata updates of the same track
+            entry = {"t": round(played_at or time.time(), 3)}
+            entry.update((key, song[key]) for key in RECORDED_KEYS if key in song)
+            line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+            if self.count % CHECKPOINT_INTERVAL == 0:
+                self.index.write(CHECKPOINT.pack(entry["t"], self.size))
+                self.index.flush()
+                self.times.append(entry["t"])
+                self.offsets.append(self.size)
+            self.log.write(line)
+            self.log.flush()
+            self.size += len(line)
+            self.count += 1
+            self.last_trackid = trackid
+
+    # Output: [(offset, record), ...] of the records in [start, end)
+    def _read_block(self, start: int, end: int) -> list:
+        with open(self.path, "rb") as log:
+            log.seek(start)
+            data = log.read(end - start)
+        records = []
+        offset = start
+        for line in data.splitlines(keepends=True):
+            records.append((offset, json.loads(line)))
+            offset += len(line)
+        return records
+
+    def _is_boundary(self, offset: int, size: int) -> bool:
+        if offset == 0 or offset == size:
+            return True
+        if offset > size:
+            return False
+        with open(self.path, "rb") as log:
+            log.seek(offset - 1)
+            return log.read(1) == b"\n"
+
+    # Records played in [since, until), newest first unless oldest_first.
+    # cursor is the next_cursor of the previous page
+    # Output: {"status": True, "history": [...], "next_cursor": str or None}
+    def query(
+        self,
+        since: float = None,
+        until: float = None,
+        cursor: str = None,
+        limit: int = 50,
+        oldest_first: bool = False,
+    ) -> dict:
+        with self.lock:
+            if not self.writer:
+                self._refresh()
+            times, offsets, size = list(self.times), list(self.offsets), self.size
+        if limit < 1:
+            return {
+                "status": False,
+                "error": "limit must be at least 1",
+                "http_status_code": 400,
+            }
+        since = float("-inf") if since is None else since
+        until = float("inf") if until is None else until
+        if cursor is not None:
+            if not cursor.isdigit() or not self._is_boundary(int(cursor), size):
+                return {
+                    "status": False,
+                    "error": "invalid cursor",
+                    "http_status_code": 400,
+                }
+            cursor = int(cursor)
+        if oldest_first:
+            return self._query_forward(
+                times, offsets, size, since, until, cursor, limit
+            )
+        return self._query_backward(times, offsets, size, since, until, cursor, limit)
+
+    def _query_forward(self, times, offsets, size, since, until, cursor, limit):
+        if cursor is None:
+            # Last block starting before since, its first records may match
+            cursor = (
+                offsets[max(bisect.bisect_right(times, since) - 1, 0)] if offsets else 0
+            )
+        history = []
+        block = bisect.bisect_right(offsets, cursor) - 1
+        while cursor < size:
+            end = offsets[block + 1] if block + 1 < len(offsets) else size
+            for offset, record in self._read_block(cursor, end):
+                if record["t"] >= until:
+                    return {"status": True, "history": history, "next_cursor": None}
+                if record["t"] < since:
+                    continue
+                if len(history) == limit:
+                    return {
+                        "status": True,
+                        "history": history,
+                        "next_cursor": str(offset),
+                    }
+                history.append(record)
+            cursor = end
+            block += 1
+        return {"status": True, "history": history, "next_cursor": None}
+
+    def _query_backward(self, times, offsets, size, since, until, cursor, limit):
+        if cursor is None:
+            # First block starting at or after until, none of it matches
+            block = bisect.bisect_left(times, until)
+            cursor = offsets[block] if block < len(offsets) else size
+        history = []
+        last_offset = cursor
+        block = bisect.bisect_left(offsets, cursor) - 1
+        while block >= 0:
+            for offset, record in reversed(self._read_block(offsets[block], cursor)):
+                if record["t"] < since:
+                    return {"status": True, "history": history, "next_cursor": None}
+                if record["t"] >= until:
+                    continue
+                if len(history) == limit:
+                    # The next page holds the records before the last returned
+                    return {
+                        "status": True,
+                        "history": history,
+                        "next_cursor": str(last_offset),
+                    }
+                history.append(record)
+                last_offset = offset
+            cursor = offsets[block]
+            block -= 1
+        return {"status": True, "history": history, "next_cursor": None}
+
+
+def _record_tracks(history: History, backend, subscription):
+    # The track playing at start, recorded unless already the last one
+    output = backend.get_current_song()
+    if output["status"]:
+        history.record(output["current_song"])
+    while True:
+        event = subscription.get()
+        if event is None or event[0] != "track":
+            continue
+        try:
+            history.record(event[1]["current_song"])
+        except OSError:
+            pass  # Disk full or gone, keep the server running
+
+
+# Enables the history, recording the track changes published by the backend
+# if no other process records them already. Disabled with path set to None
+def set_history(path: str, backend=None):
+    global HISTORY
+    if path is None:
+        HISTORY = None
+        return
+    HISTORY = History(path)
+    if backend is not None and HISTORY.writer:
+        threading.Thread(
+            target=_record_tracks,
+            args=(HISTORY, backend, backend.events.subscribe()),
+            name="history",
+            daemon=True,
+        ).start()
+
+
+def get_history() -> History:
+    return HISTORY
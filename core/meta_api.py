@@ -1,7 +1,13 @@
-from flask_restx import Namespace, Resource
+import json
 
-from .web_server_utils import (basic_auth_required, error_model,
-                               formated_output, get_backend, normal_model)
+from flask import Response, request, stream_with_context
+from flask_restx import Namespace, Resource, reqparse
+
+from .art_cache import get_art_cache
+from .history import get_history
+from .web_server_utils import (acquire_stream_slot, basic_auth_required,
+                               conditional_get, error_model, formated_output,
+                               get_backend, normal_model, release_stream_slot)
 
 meta_api = Namespace(
     "Meta API",
@@ -25,8 +31,10 @@ class Show(Resource):
 @meta_api.route("/current")
 class CurrentSong(Resource):
     @meta_api.doc(security="basic")
+    @meta_api.response(304, "Not Modified")
     @meta_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get()
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -36,8 +44,10 @@ class CurrentSong(Resource):
 @meta_api.route("/playing")
 class Playing(Resource):
     @meta_api.doc(security="basic")
+    @meta_api.response(304, "Not Modified")
     @meta_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get()
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -46,7 +56,11 @@ class Playing(Resource):
 
 @meta_api.route("/sync")
 class Sync(Resource):
-    @meta_api.doc(security="basic")
+    @meta_api.doc(
+        security="basic",
+        description="Rebinds to the player and reloads its state. Not needed \
+after a restart of the player anymore, it is followed automatically",
+    )
     @meta_api.response(200, "Ok", normal_model)
     @meta_api.response(500, "Error", error_model)
     @basic_auth_required
@@ -54,3 +68,195 @@ class Sync(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
         return formated_output(get_backend().resync())
+
+
+# Seconds between two keepalive comments on an idle event stream
+EVENTS_KEEPALIVE = 15
+
+
+@meta_api.route("/events")
+class Events(Resource):
+    @meta_api.doc(
+        security="basic",
+        description="Server-Sent Events stream of player changes. Event types \
+are track, playing, volume, shuffle, loop and seeked. Only the last unread \
+event of each type is sent, a dropped event tells how many were replaced",
+    )
+    @meta_api.response(500, "Error", error_model)
+    @meta_api.response(503, "Too many streams open", error_model)
+    @basic_auth_required
+    def get(self):
+        backend = get_backend()
+        if backend is None:
+            return {"status": False, "error": "backend is None"}
+        if not acquire_stream_slot():
+            return {"status": False, "error": "too many streams open"}, 503
+        subscription = backend.events.subscribe()
+
+        def stream():
+            try:
+                yield ": connected\n\n"
+                while True:
+                    event = subscription.get(timeout=EVENTS_KEEPALIVE)
+                    dropped = subscription.pop_dropped()
+                    if dropped:
+                        yield f"event: dropped\ndata: {json.dumps(dropped)}\n\n"
+                    if event is None:
+                        yield ": keepalive\n\n"
+                        continue
+                    name, data = event
+                    yield f"event: {name}\ndata: {json.dumps(data)}\n\n"
+            finally:
+                backend.events.unsubscribe(subscription)
+
+        response = Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        # Also called when the client leaves before the stream started
+        response.call_on_close(release_stream_slot)
+        return response
+
+
+# Largest variant size, so that the cache only holds reasonable variants
+MAX_ART_SIZE = 1024
+
+
+def art_size(size: str):
+    value = int(size)
+    if 0 < value <= MAX_ART_SIZE:
+        return value
+    raise ValueError(f"size must be between 1 and {MAX_ART_SIZE}")
+
+
+art_parser = reqparse.RequestParser()
+art_parser.add_argument(
+    "trackid",
+    type=str,
+    location="args",
+    help="Track to get the cover of, among the last played. Defaults to \
+the current one",
+)
+art_parser.add_argument(
+    "size",
+    type=art_size,
+    location="args",
+    help=f"Bound the cover to size x size pixels, up to {MAX_ART_SIZE}",
+)
+
+
+@meta_api.route("/art")
+class Art(Resource):
+    @meta_api.doc(
+        security="basic",
+        description="Cover of the current track, served from a local cache",
+    )
+    @meta_api.response(304, "Not Modified")
+    @meta_api.response(404, "Unknown track or cache disabled", error_model)
+    @meta_api.response(502, "Cover could not be fetched", error_model)
+    @meta_api.expect(art_parser)
+    @basic_auth_required
+    def get(self):
+        art_cache = get_art_cache()
+        if art_cache is None:
+            return {"status": False, "error": "art cache is disabled"}, 404
+        args = art_parser.parse_args()
+
+        trackid = args.get("trackid")
+        if trackid is None:
+            if get_backend() is None:
+                return {"status": False, "error": "backend is None"}
+            output = get_backend().get_current_song()
+            if not output["status"]:
+                return formated_output(output)
+            art_cache.remember(output["current_song"])
+            trackid = output["current_song"].get("trackid")
+
+        output = art_cache.get(trackid, args.get("size"))
+        if not output["status"]:
+            return formated_output(output)
+        # Explicit tracks always have the same cover, the current one changes
+        cache_control = (
+            "private, max-age=86400" if args.get("trackid") else "private, no-cache"
+        )
+        headers = {"ETag": f'"{output["etag"]}"', "Cache-Control": cache_control}
+        if request.if_none_match.contains(output["etag"]):
+            return Response(status=304, headers=headers)
+        return Response(
+            output["data"], mimetype=output["content_type"], headers=headers
+        )
+
+
+# Most records answered by a single /history request
+MAX_HISTORY_LIMIT = 500
+
+
+def history_limit(limit: str):
+    value = int(limit)
+    if 0 < value <= MAX_HISTORY_LIMIT:
+        return value
+    raise ValueError(f"limit must be between 1 and {MAX_HISTORY_LIMIT}")
+
+
+history_parser = reqparse.RequestParser()
+history_parser.add_argument(
+    "since",
+    type=float,
+    location="args",
+    help="Only tracks started at or after this unix time",
+)
+history_parser.add_argument(
+    "until",
+    type=float,
+    location="args",
+    help="Only tracks started before this unix time",
+)
+history_parser.add_argument(
+    "cursor",
+    type=str,
+    location="args",
+    help="next_cursor of the previous page",
+)
+history_parser.add_argument(
+    "limit",
+    type=history_limit,
+    location="args",
+    default=50,
+    help=f"Most tracks to return, up to {MAX_HISTORY_LIMIT}",
+)
+history_parser.add_argument(
+    "order",
+    type=str,
+    location="args",
+    choices=("newest", "oldest"),
+    default="newest",
+    help="newest or oldest tracks first",
+)
+
+
+@meta_api.route("/history")
+class History(Resource):
+    @meta_api.doc(
+        security="basic",
+        description="Tracks played, with the unix time they started at (t). \
+Pass next_cursor back as cursor, with the same filters, for the next page",
+    )
+    @meta_api.response(404, "History disabled", error_model)
+    @meta_api.expect(history_parser)
+    @basic_auth_required
+    def get(self):
+        history = get_history()
+        if history is None:
+            return {"status": False, "error": "history is disabled"}, 404
+        args = history_parser.parse_args()
+
+        return formated_output(
+            history.query(
+                args.get("since"),
+                args.get("until"),
+                args.get("cursor"),
+                args.get("limit"),
+                args.get("order") == "oldest",
+            )
+        )
@@ -0,0 +1,134 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import functools
+import time
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, Counter, Gauge, Histogram,
+                               generate_latest)
+
+from .backends import backend_methods
+
+REQUEST_DURATION = Histogram(
+    "spotify_api_request_duration_seconds",
+    "Time spent answering HTTP requests",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "spotify_api_requests_in_flight",
+    "HTTP requests being answered",
+    ["method", "route"],
+)
+BACKEND_CALLS = Counter(
+    "spotify_api_backend_calls_total",
+    "Backend method calls, by outcome (ok, error or exception)",
+    ["backend", "method", "outcome"],
+)
+BACKEND_DURATION = Histogram(
+    "spotify_api_backend_call_duration_seconds",
+    "Time spent in backend methods",
+    ["backend", "method"],
+)
+DBUS_CALLS = Counter(
+    "spotify_api_dbus_calls_total",
+    "D-Bus method calls, by outcome (ok or the D-Bus error name)",
+    ["interface", "member", "property", "outcome"],
+)
+DBUS_DURATION = Histogram(
+    "spotify_api_dbus_call_duration_seconds",
+    "Time spent waiting on D-Bus method calls",
+    ["interface", "member", "property"],
+)
+CACHE_LOOKUPS = Counter(
+    "spotify_api_cache_lookups_total",
+    "Cache lookups, by result (hit or miss)",
+    ["cache", "result"],
+)
+REJECTIONS = Counter(
+    "spotify_api_rejections_total",
+    "Requests and backend calls turned away, by reason (rate_limited or \
+overloaded) and route class (read or control)",
+    ["reason", "route_class"],
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_rejection(reason: str, route_class: str):
+    REJECTIONS.labels(reason, route_class).inc()
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def instrument_app(app):
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = _route()
+        REQUESTS_IN_FLIGHT.labels(request.method, g.metrics_route).inc()
+
+    @app.after_request
+    def record_request(response):
+        if "metrics_route" in g:
+            REQUEST_DURATION.labels(
+                request.method, g.metrics_route, response.status_code
+            ).observe(time.perf_counter() - g.metrics_start)
+        return response
+
+    @app.teardown_request
+    def end_request(_):
+        if "metrics_route" in g:
+            REQUESTS_IN_FLIGHT.labels(request.method, g.metrics_route).dec()
+
+
+def _instrument_method(get_backend_name, name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "exception"
+        try:
+            output = method(*args, **kwargs)
+            outcome = (
+                "ok" if isinstance(output, dict) and output.get("status") else "error"
+            )
+            return output
+        finally:
+            # Read after the call, which may have built the backend
+            backend_name = get_backend_name()
+            BACKEND_DURATION.labels(backend_name, name).observe(
+                time.perf_counter() - start
+            )
+            BACKEND_CALLS.labels(backend_name, name, outcome).inc()
+
+    return wrapper
+
+
+# Times every method of the SpotifyAPIBackend interface on the given instance,
+# whichever backend it is
+def instrument_backend(backend):
+    # A LazyBackend is labelled with the backend it builds, once built
+    def get_backend_name() -> str:
+        return type(getattr(backend, "backend", None) or backend).__name__
+
+    for name in backend_methods():
+        setattr(
+            backend,
+            name,
+            _instrument_method(get_backend_name, name, getattr(backend, name)),
+        )
+    return backend
+
+
+def metrics_view():
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -1,5 +1,7 @@
-from flask_restx import Namespace, Resource, fields, reqparse
+from flask_restx import Namespace, Resource, fields
 
+from .command_queue import get_command_queue
+from .validation import CompiledModel
 from .web_server_utils import (basic_auth_required, error_model,
                                formated_output, get_backend, normal_model)
 
@@ -93,10 +95,14 @@ seek_model = player_api.model(
 )
 
 
+seek_validator = CompiledModel(seek_model)
+
+
 @player_api.route("/seek")
 class Seek(Resource):
     @player_api.doc(security="basic")
     @player_api.response(200, "Ok", normal_model)
+    @player_api.response(202, "Queued", normal_model)
     @player_api.response(500, "Error", error_model)
     @player_api.expect(seek_model)
     @basic_auth_required
@@ -104,13 +110,8 @@ class Seek(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
 
-        parser = reqparse.RequestParser()
-        parser.add_argument(
-            "seconds",
-            type=int,
-            help="Seconds to seek. \
-Negative to seek backward",
-        )
-        args = parser.parse_args()
+        args = seek_validator.parse_request()
 
+        if get_command_queue() is not None:
+            return formated_output(get_command_queue().seek(args.get("seconds")))
         return formated_output(get_backend().seek(args.get("seconds")))
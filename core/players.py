@@ -0,0 +1,95 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import json
+import re
+import threading
+
+from flask import has_request_context, request
+
+# WSGI environ key holding the id of the player a request is routed to
+PLAYER_ENVIRON_KEY = "spotify_api.player"
+PLAYER_PATH = re.compile(r"^/api/players/([^/]+)(/.*)$")
+
+
+# The players served by the API, by id. Backends of the discovered players
+# are only built when first used, by make_backend(player_id).
+class PlayerRegistry:
+    def __init__(self, default_player: str, default_backend, make_backend=None):
+        self.lock = threading.Lock()
+        self.default_player = default_player
+        self.make_backend = make_backend
+        # player id -> backend, None until first used
+        self.players = {default_player: default_backend}
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.players
+
+    def add(self, player_id: str):
+        with self.lock:
+            self.players.setdefault(player_id, None)
+
+    # The default player is kept, its backend handles the player coming back
+    def remove(self, player_id: str):
+        if player_id == self.default_player:
+            return
+        with self.lock:
+            backend = self.players.pop(player_id, None)
+        if backend is not None:
+            backend.close()
+
+    def get(self, player_id: str):
+        with self.lock:
+            if player_id not in self.players:
+                return None
+            backend = self.players[player_id]
+            if backend is None and self.make_backend is not None:
+                backend = self.players[player_id] = self.make_backend(player_id)
+            return backend
+
+    def list(self) -> list:
+        with self.lock:
+            return sorted(self.players)
+
+
+# Serves /api/players/<id>/... with the routes of /api/..., on the backend of
+# that player. The routes without a player stay aliases of the default one.
+class PlayerRoutingMiddleware:
+    def __init__(self, app, registry: PlayerRegistry):
+        self.app = app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        match = PLAYER_PATH.match(environ.get("PATH_INFO", ""))
+        if match is not None:
+            player_id, path = match.groups()
+            if player_id not in self.registry:
+                body = json.dumps(
+                    {"status": False, "error": f'unknown player "{player_id}"'}
+                ).encode()
+                start_response(
+                    "404 NOT FOUND",
+                    [
+                        ("Content-Type", "application/json"),
+                        ("Content-Length", str(len(body))),
+                    ],
+                )
+                return [body]
+            environ["PATH_INFO"] = "/api" + path
+            if player_id != self.registry.default_player:
+                environ[PLAYER_ENVIRON_KEY] = player_id
+        return self.app(environ, start_response)
+
+
+# Output: id of the player the current request is routed to, None for the
+# default one (and outside of requests)
+def get_player() -> str:
+    if not has_request_context():
+        return None
+    return request.environ.get(PLAYER_ENVIRON_KEY)
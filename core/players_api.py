@@ -0,0 +1,52 @@
+from flask_restx import Namespace, Resource, fields
+
+from .web_server_utils import basic_auth_required, formated_output, get_players
+
+players_api = Namespace(
+    "Players API",
+    description="Players served by the API. Every /api/... route is also \
+served as /api/players/<id>/... for the player <id>",
+    path="/api/players",
+)
+
+
+player_model = players_api.model(
+    "Player",
+    {
+        "id": fields.String(
+            description="Id to use in /api/players/<id>/...",
+        ),
+        "default": fields.Boolean(
+            description="Player answering the /api/... routes",
+        ),
+    },
+)
+
+players_model = players_api.model(
+    "Players",
+    {
+        "status": fields.Boolean(
+            description="Status of the executed action",
+            default=True,
+        ),
+        "players": fields.List(fields.Nested(player_model)),
+    },
+)
+
+
+@players_api.route("")
+class Players(Resource):
+    @players_api.doc(security="basic")
+    @players_api.response(200, "Ok", players_model)
+    @basic_auth_required
+    def get(self):
+        players = get_players()
+        return formated_output(
+            {
+                "status": True,
+                "players": [
+                    {"id": player, "default": player == players.default_player}
+                    for player in players.list()
+                ],
+            }
+        )
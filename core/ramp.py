@@ -0,0 +1,154 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import math
+import threading
+import time
+
+from .players import get_player
+from .web_server_utils import get_backend
+
+# Most set_volume calls a ramp makes per second
+MAX_TICK_RATE = 20
+# Volume treated as silence by the logarithmic curve (-60 dB)
+SILENCE = 0.001
+
+CURVES = ("linear", "logarithmic")
+
+_lock = threading.Lock()
+# player id (None for the default one) -> its last VolumeRamp
+_ramps = {}
+
+
+def _linear(start: float, target: float, progress: float) -> float:
+    return start + (target - start) * progress
+
+
+# Moves linearly in decibels, which sounds like an even fade to the ear
+def _logarithmic(start: float, target: float, progress: float) -> float:
+    start_db = 20 * math.log10(max(start, SILENCE))
+    target_db = 20 * math.log10(max(target, SILENCE))
+    volume = 10 ** ((start_db + (target_db - start_db) * progress) / 20)
+    return 0.0 if volume <= SILENCE and target < SILENCE else volume
+
+
+class VolumeRamp:
+    def __init__(
+        self,
+        start: float,
+        target: float,
+        duration: float,
+        curve: str,
+        player: str = None,
+    ):
+        self.player = player
+        self.start = start
+        self.target = target
+        self.duration = duration
+        self.curve = curve
+        self.current = start
+        self.started = time.monotonic()
+        self.finished = None
+        self.error = None
+        self.cancelled = threading.Event()
+
+    def volume_at(self, progress: float) -> float:
+        if progress >= 1:
+            return self.target
+        if self.curve == "logarithmic":
+            return _logarithmic(self.start, self.target, progress)
+        return _linear(self.start, self.target, progress)
+
+    def progress(self) -> float:
+        if self.duration <= 0:
+            return 1.0
+        end = self.finished if self.finished is not None else time.monotonic()
+        return min((end - self.started) / self.duration, 1.0)
+
+    def run(self):
+        interval = 1 / MAX_TICK_RATE
+        while not self.cancelled.is_set():
+            progress = self.progress()
+            volume = round(self.volume_at(progress), 4)
+            if volume != self.current or progress >= 1:
+                backend = get_backend(self.player)
+                if backend is None:
+                    self.error = "player is gone"
+                    break
+                output = backend.set_volume(volume)
+                if not output.get("status"):
+                    self.error = output.get("error")
+                    break
+                self.current = volume
+            if progress >= 1 or self.cancelled.wait(interval):
+                break
+        self.finished = time.monotonic()
+
+    def to_dict(self) -> dict:
+        if self.error is not None:
+            state = "failed"
+        elif self.cancelled.is_set():
+            state = "cancelled"
+        elif self.finished is not None:
+            state = "done"
+        else:
+            state = "running"
+        return {
+            "state": state,
+            "start": self.start,
+            "target": self.target,
+            "current": self.current,
+            "duration": self.duration,
+            "curve": self.curve,
+            "progress": round(self.progress(), 4),
+            "error": self.error,
+        }
+
+
+# Output: {"ramp": ramp description} or an error
+def start_volume_ramp(target: float, duration: float, curve: str) -> dict:
+    if curve not in CURVES:
+        return {
+            "status": False,
+            "error": f'curve must be one of {", ".join(CURVES)}',
+            "http_status_code": 400,
+        }
+    if duration is None or duration < 0:
+        return {
+            "status": False,
+            "error": "duration must be positive",
+            "http_status_code": 400,
+        }
+
+    current = get_backend().get_volume()
+    if not current.get("status"):
+        return current
+
+    player = get_player()
+    ramp = VolumeRamp(current.get("volume"), target, duration, curve, player)
+    with _lock:
+        if player in _ramps:
+            _ramps[player].cancelled.set()
+        _ramps[player] = ramp
+    threading.Thread(target=ramp.run, name="volume-ramp", daemon=True).start()
+    return {"status": True, "ramp": ramp.to_dict()}
+
+
+def cancel_volume_ramp() -> dict:
+    with _lock:
+        ramp = _ramps.get(get_player())
+    if ramp is not None and ramp.finished is None:
+        ramp.cancelled.set()
+    return get_volume_ramp()
+
+
+def get_volume_ramp() -> dict:
+    with _lock:
+        ramp = _ramps.get(get_player())
+    return {"status": True, "ramp": ramp.to_dict() if ramp is not None else None}
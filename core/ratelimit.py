@@ -0,0 +1,158 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import functools
+import threading
+import time
+
+from .backends import backend_methods
+from .metrics import record_rejection
+
+# Seconds between two sweeps of the idle buckets
+PRUNE_INTERVAL = 60
+# Seconds a backend call waits for a free slot before being shed
+ADMISSION_WAIT = 0.05
+
+RATE_LIMITER = None
+
+
+# Refills rate tokens per second, holding up to burst of them
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Output: 0 when a token is available, or the seconds until one is
+    def wait(self, now: float) -> float:
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    # Output: 0 when a token was taken, or the seconds until one is available
+    def take(self, now: float) -> float:
+        retry_after = self.wait(now)
+        if not retry_after:
+            self.tokens -= 1
+        return retry_after
+
+
+# One token bucket per user and route class ("read" or "control"), and per
+# client address for failed authentications ("auth")
+# limits: {route class: (requests per second, burst)}, classes missing from it
+#         are not limited
+class RateLimiter:
+    def __init__(self, limits: dict):
+        self.limits = limits
+        self.lock = threading.Lock()
+        # (user, route class) -> TokenBucket
+        self.buckets = {}
+        self.pruned = time.monotonic()
+
+    # Output: 0 when the request may go on, or the seconds to wait before
+    #         retrying
+    def take(self, user, route_class: str) -> float:
+        retry_after = self._bucket_call(user, route_class, TokenBucket.take)
+        if retry_after:
+            record_rejection("rate_limited", route_class)
+        return retry_after
+
+    # Same as take, without using up a token
+    def wait(self, user, route_class: str) -> float:
+        retry_after = self._bucket_call(user, route_class, TokenBucket.wait)
+        if retry_after:
+            record_rejection("rate_limited", route_class)
+        return retry_after
+
+    def _bucket_call(self, user, route_class: str, method) -> float:
+        limit = self.limits.get(route_class)
+        if limit is None:
+            return 0.0
+        now = time.monotonic()
+        with self.lock:
+            if now - self.pruned > PRUNE_INTERVAL:
+                self._prune(now)
+            bucket = self.buckets.get((user, route_class))
+            if bucket is None:
+                bucket = self.buckets[(user, route_class)] = TokenBucket(*limit, now)
+            return method(bucket, now)
+
+    # Full buckets are the same as new ones, drop them
+    def _prune(self, now: float):
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self.buckets[key]
+        self.pruned = now
+
+
+# Output: the class of the limits applying to a request of that HTTP method
+def route_class(method: str) -> str:
+    return "read" if method in ("GET", "HEAD") else "control"
+
+
+# Output: the class of the limits applying to a backend command
+def command_class(command: str) -> str:
+    return "read" if str(command).startswith("get_") else "control"
+
+
+# Caps the backend calls running at once, across all players. Calls that
+# don't get a slot within ADMISSION_WAIT are answered 503 right away instead
+# of queueing behind a slow player.
+class Admission:
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+    def call(self, name: str, method, *args, **kwargs) -> dict:
+        if not self.slots.acquire(timeout=ADMISSION_WAIT):
+            record_rejection("overloaded", command_class(name))
+            return {
+                "status": False,
+                "error": f"server busy, {self.max_in_flight} backend calls \
+already running",
+                "http_status_code": 503,
+            }
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.slots.release()
+
+
+def _admit_method(admission: Admission, name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return admission.call(name, method, *args, **kwargs)
+
+    return wrapper
+
+
+# Puts every method of the SpotifyAPIBackend interface that reaches the player
+# behind the admission control, on the given instance
+def admit_backend_calls(backend, admission: Admission = None):
+    if admission is None:
+        return backend
+    for name in backend_methods():
+        setattr(backend, name, _admit_method(admission, name, getattr(backend, name)))
+    return backend
+
+
+def set_rate_limits(limits: dict = None):
+    global RATE_LIMITER
+    RATE_LIMITER = RateLimiter(limits) if limits else None
+
+
+def get_rate_limiter() -> RateLimiter:
+    return RATE_LIMITER
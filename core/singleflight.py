@@ -0,0 +1,103 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import functools
+import threading
+import time
+
+from .backends import backend_methods
+from .metrics import record_cache
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.output = None
+        self.error = None
+
+
+# Concurrent calls made with the same key share a single execution of the
+# function and its output. With a freshness window, an output also answers
+# the calls made up to `freshness` seconds after it was produced. Shared calls
+# are counted as hits of the `cache` metric.
+class SingleFlight:
+    def __init__(self, freshness: float = 0.0, cache: str = "singleflight"):
+        self.freshness = freshness
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.calls = {}
+        # key -> (output, time.monotonic() it was produced at)
+        self.outputs = {}
+
+    def do(self, key, function):
+        with self.lock:
+            if self.freshness > 0 and key in self.outputs:
+                output, produced = self.outputs[key]
+                if time.monotonic() - produced <= self.freshness:
+                    record_cache(self.cache, True)
+                    return dict(output)
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        record_cache(self.cache, not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Callers may modify what they get (formated_output pops from it)
+            return dict(call.output)
+
+        try:
+            call.output = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                if call.error is None and self.freshness > 0:
+                    now = time.monotonic()
+                    # Keys embed the state tag, drop the outputs of past states
+                    for old_key, (_, produced) in list(self.outputs.items()):
+                        if now - produced > self.freshness:
+                            del self.outputs[old_key]
+                    self.outputs[key] = (call.output, now)
+            call.done.set()
+        return dict(call.output)
+
+
+def _coalesce_method(flight: SingleFlight, backend, name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        # With the state tag in the key, a change of state is never answered
+        # with an output read before it (nor with a stale ETag)
+        key = (
+            name,
+            backend.get_state_tag(),
+            repr(args),
+            repr(sorted(kwargs.items())),
+        )
+        return flight.do(key, lambda: method(*args, **kwargs))
+
+    return wrapper
+
+
+# Puts every get_* method of the SpotifyAPIBackend interface behind a shared
+# SingleFlight, on the given instance
+def coalesce_backend_reads(backend, freshness: float = 0.0):
+    flight = SingleFlight(freshness)
+    for name in backend_methods("get_"):
+        setattr(
+            backend,
+            name,
+            _coalesce_method(flight, backend, name, getattr(backend, name)),
+        )
+    return backend
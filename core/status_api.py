@@ -1,7 +1,12 @@
 from flask_restx import Namespace, Resource, fields, reqparse
 
-from .web_server_utils import (basic_auth_required, error_model,
-                               formated_output, get_backend, normal_model)
+from .command_queue import get_command_queue
+from .ramp import (CURVES, cancel_volume_ramp, get_volume_ramp,
+                   start_volume_ramp)
+from .validation import CompiledModel
+from .web_server_utils import (basic_auth_required, conditional_get,
+                               error_model, formated_output, get_backend,
+                               normal_model)
 
 status_api = Namespace(
     "Status API",
@@ -21,12 +26,15 @@ position_model = status_api.model(
     },
 )
 
+position_validator = CompiledModel(position_model)
+
 
 @status_api.route("/position")
 class Position(Resource):
     @status_api.doc(security="basic")
     @status_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get(unless=lambda _: True)
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -34,6 +42,7 @@ class Position(Resource):
 
     @status_api.doc(security="basic")
     @status_api.response(200, "Ok", normal_model)
+    @status_api.response(202, "Queued", normal_model)
     @status_api.response(500, "Error", error_model)
     @status_api.expect(position_model)
     @basic_auth_required
@@ -41,15 +50,12 @@ class Position(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
 
-        parser = reqparse.RequestParser()
-        parser.add_argument(
-            "seconds",
-            type=int,
-            help="New position of the \
-current track",
-        )
-        args = parser.parse_args()
+        args = position_validator.parse_request()
 
+        if get_command_queue() is not None:
+            return formated_output(
+                get_command_queue().set_position(args.get("seconds"))
+            )
         return formated_output(get_backend().set_position(args.get("seconds")))
 
 
@@ -75,12 +81,16 @@ respectively",
     },
 )
 
+loop_validator = CompiledModel(loop_model, {"loop": loop_value})
+
 
 @status_api.route("/loop")
 class Loop(Resource):
     @status_api.doc(security="basic")
+    @status_api.response(304, "Not Modified")
     @status_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get()
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -95,13 +105,7 @@ class Loop(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
 
-        parser = reqparse.RequestParser()
-        parser.add_argument(
-            "loop",
-            type=loop_value,
-            help="Disable loop, set playlist loop or track loop.",
-        )
-        args = parser.parse_args()
+        args = loop_validator.parse_request()
 
         return formated_output(get_backend().set_loop(args.get("loop")))
 
@@ -118,11 +122,16 @@ respectively",
 )
 
 
+shuffle_validator = CompiledModel(shuffle_model)
+
+
 @status_api.route("/shuffle")
 class Shuffle(Resource):
     @status_api.doc(security="basic")
+    @status_api.response(304, "Not Modified")
     @status_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get()
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -137,14 +146,7 @@ class Shuffle(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
 
-        parser = reqparse.RequestParser()
-        parser.add_argument(
-            "shuffle",
-            type=bool,
-            help='Enable / Disable shuffle mode. No effect on \
-"Smart Shuffle" functionality',
-        )
-        args = parser.parse_args()
+        args = shuffle_validator.parse_request()
 
         return formated_output(get_backend().set_shuffle(args.get("shuffle")))
 
@@ -168,11 +170,16 @@ volume_model = status_api.model(
 )
 
 
+volume_validator = CompiledModel(volume_model, {"volume": volume_value})
+
+
 @status_api.route("/volume")
 class Volume(Resource):
     @status_api.doc(security="basic")
+    @status_api.response(304, "Not Modified")
     @status_api.response(500, "Error", error_model)
     @basic_auth_required
+    @conditional_get()
     def get(self):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
@@ -180,6 +187,7 @@ class Volume(Resource):
 
     @status_api.doc(security="basic")
     @status_api.response(200, "Ok", normal_model)
+    @status_api.response(202, "Queued", normal_model)
     @status_api.response(500, "Error", error_model)
     @status_api.expect(volume_model)
     @basic_auth_required
@@ -187,12 +195,132 @@ class Volume(Resource):
         if get_backend() is None:
             return {"status": False, "error": "backend is None"}
 
-        parser = reqparse.RequestParser()
-        parser.add_argument(
-            "volume",
-            type=volume_value,
-            help="Set volume. Must be between 0.0 and 1.0",
-        )
-        args = parser.parse_args()
+        args = volume_validator.parse_request()
 
+        cancel_volume_ramp()
+        if get_command_queue() is not None:
+            return formated_output(get_command_queue().set_volume(args.get("volume")))
         return formated_output(get_backend().set_volume(args.get("volume")))
+
+
+ramp_model = status_api.model(
+    "VolumeRamp",
+    {
+        "target": fields.Float(
+            required=True,
+            description="Volume to reach. Must be between 0.0 and 1.0",
+        ),
+        "duration": fields.Float(
+            required=True,
+            description="Seconds to reach the target volume in",
+        ),
+        "curve": fields.String(
+            description="linear, or logarithmic for an even fade to the ear",
+            enum=list(CURVES),
+            default="linear",
+        ),
+    },
+)
+
+
+ramp_validator = CompiledModel(ramp_model, {"target": volume_value})
+
+
+@status_api.route("/volume/ramp")
+class VolumeRamp(Resource):
+    @status_api.doc(security="basic")
+    @status_api.response(500, "Error", error_model)
+    @basic_auth_required
+    def get(self):
+        return formated_output(get_volume_ramp())
+
+    @status_api.doc(
+        security="basic",
+        description="Fade the volume from its current level to target. \
+Replaces the running ramp, if any. Setting the volume cancels it",
+    )
+    @status_api.response(500, "Error", error_model)
+    @status_api.expect(ramp_model)
+    @basic_auth_required
+    def post(self):
+        if get_backend() is None:
+            return {"status": False, "error": "backend is None"}
+
+        args = ramp_validator.parse_request()
+
+        return formated_output(
+            start_volume_ramp(
+                args.get("target"), args.get("duration"), args.get("curve")
+            )
+        )
+
+    @status_api.doc(security="basic")
+    @status_api.response(500, "Error", error_model)
+    @basic_auth_required
+    def delete(self):
+        return formated_output(cancel_volume_ramp())
+
+
+STATE_FIELDS = ("position", "loop", "shuffle", "volume", "playing", "current_song")
+
+
+def state_fields(fields: list):
+    for field in fields:
+        if not isinstance(field, str):
+            raise ValueError(f"{field!r} is not a string")
+    return fields
+
+
+# Arguments of the get_state command, the snapshot route takes its fields
+# from the query string
+state_model = status_api.model(
+    "State",
+    {
+        "fields": fields.List(
+            fields.String(enum=list(STATE_FIELDS)),
+            description="State fields to return, all of them if missing",
+        )
+    },
+)
+
+state_validator = CompiledModel(state_model, {"fields": state_fields})
+
+
+snapshot_parser = reqparse.RequestParser()
+snapshot_parser.add_argument(
+    "fields",
+    type=str,
+    location="args",
+    help="Comma separated list of state fields to return. \
+Any of position, loop, shuffle, volume, playing, current_song",
+)
+
+
+# The position changes continuously, so a snapshot holding it has no ETag
+def snapshot_has_position(request) -> bool:
+    fields = request.args.get("fields")
+    return not fields or "position" in fields
+
+
+@status_api.route("/snapshot")
+class Snapshot(Resource):
+    @status_api.doc(security="basic")
+    @status_api.response(304, "Not Modified")
+    @status_api.response(500, "Error", error_model)
+    @status_api.expect(snapshot_parser)
+    @basic_auth_required
+    @conditional_get(unless=snapshot_has_position)
+    def get(self):
+        if get_backend() is None:
+            return {"status": False, "error": "backend is None"}
+
+        args = snapshot_parser.parse_args()
+        fields = None
+        if args.get("fields"):
+            fields = [
+                field.strip()
+                for field in args.get("fields").split(",")
+                if field.strip()
+            ]
+
+        return formated_output(get_backend().get_state(fields))
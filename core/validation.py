@@ -0,0 +1,132 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+from flask import request
+from flask_restx import abort, fields
+
+
+def _integer(value):
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not an integer")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{value!r} is not an integer")
+    return int(value)
+
+
+def _float(value):
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a number")
+    return float(value)
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "1"):
+        return True
+    if isinstance(value, str) and value.lower() in ("false", "0"):
+        return False
+    if value in (0, 1):
+        return bool(value)
+    raise ValueError(f"{value!r} is not a boolean")
+
+
+def _string(value):
+    if not isinstance(value, str):
+        raise ValueError(f"{value!r} is not a string")
+    return value
+
+
+# Lists may also come as a comma separated string, as in query strings
+def _list(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f"{value!r} is not a list")
+    return value
+
+
+# flask-restx field type -> converter of the JSON (or query string) value
+FIELD_CONVERTERS = {
+    fields.Integer: _integer,
+    fields.Float: _float,
+    fields.Boolean: _boolean,
+    fields.String: _string,
+    fields.List: _list,
+}
+
+
+# Request body parser built once from a flask-restx model, in place of a
+# RequestParser built on every request. The model stays the documentation
+# given to @expect, so the Swagger spec does not change.
+# converters: {field name: function applied to the value once typed, which
+#             raises ValueError or TypeError to reject it}
+class CompiledModel:
+    def __init__(self, model, converters: dict = None):
+        converters = converters or {}
+        # (name, type converter, value converter, required, default, enum,
+        # description)
+        self.fields = tuple(
+            (
+                name,
+                FIELD_CONVERTERS[type(field)],
+                converters.get(name),
+                field.required,
+                field.default,
+                getattr(field, "enum", None),
+                field.description,
+            )
+            for name, field in model.items()
+        )
+
+    def names(self) -> tuple:
+        return tuple(field[0] for field in self.fields)
+
+    # Output: {field name: value}, missing optional fields set to their
+    #         default. Raises ValueError with {field name: error} on errors
+    def parse(self, payload: dict, fallback=None) -> dict:
+        args = {}
+        errors = {}
+        for name, convert, validate, required, default, enum, doc in self.fields:
+            value = payload.get(name)
+            if value is None and fallback is not None:
+                value = fallback.get(name)
+            if value is None:
+                if required:
+                    errors[name] = f"Missing required parameter: {doc}"
+                args[name] = default
+                continue
+            try:
+                value = convert(value)
+                if validate is not None:
+                    value = validate(value)
+                elif enum and value not in enum:
+                    raise ValueError(f"{value!r} is not one of {', '.join(enum)}")
+            except (ValueError, TypeError) as e:
+                errors[name] = f"{doc} {e}"
+                continue
+            args[name] = value
+        if errors:
+            raise ValueError(errors)
+        return args
+
+    # Parses the JSON body of the current request, falling back on the query
+    # string and form values like RequestParser. Answers 400 with the errors
+    # in the RequestParser format on invalid input
+    def parse_request(self) -> dict:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            payload = {}
+        fallback = None
+        if len(payload) < len(self.fields):
+            fallback = request.values
+        try:
+            return self.parse(payload, fallback)
+        except ValueError as e:
+            abort(400, "Input payload validation failed", errors=e.args[0])
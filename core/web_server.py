@@ -8,30 +8,87 @@
 
 
 import sys
+import threading
 
 from flask import Flask
 from flask_restx import Api
 
-from .backends import DBusSpotifyAPIBackend
+from .art_cache import set_art_cache
+from .auth import set_token_settings
+from .auth_api import auth_api
+from .backends import LazyBackend, available_backends, load_backend
+from .backends.mpris import BUS_NAME, MPRIS_PREFIX
+from .batch_api import batch_api
+from .command_queue import set_command_queue
 from .db import set_valid_users
+from .history import set_history
 from .meta_api import meta_api
+from .metrics import instrument_app, instrument_backend, metrics_view
 from .player_api import player_api
+from .players import PlayerRegistry, PlayerRoutingMiddleware
+from .players_api import players_api
+from .ratelimit import Admission, admit_backend_calls, set_rate_limits
+from .singleflight import coalesce_backend_reads
 from .status_api import status_api
-from .web_server_utils import (error_model, get_backend, normal_model,
-                               set_backend, disable_authentication)
-
-AVAILABLE_BACKENDS = {"dbus": DBusSpotifyAPIBackend}
-
+from .web_server_utils import (basic_auth_required, error_model,
+                               get_backend, get_representations,
+                               normal_model, set_backend, set_max_streams,
+                               set_players, disable_authentication)
+from .ws_api import check_websocket_support, sock
 
 authorizations = {
     "basic": {
         "type": "basic",
         "description": "Enter username and password",
-    }
+    },
+    "bearer": {
+        "type": "apiKey",
+        "in": "header",
+        "name": "Authorization",
+        "description": 'Enter "Bearer <token>", with a token from /api/auth/token',
+    },
 }
 
 
-def make_app(uses_auth: bool, creds: dict, backend_name: str, version: str):
+def _watch_players(players: PlayerRegistry):
+    try:
+        from .backends.dbus_api import watch_players
+
+        watch_players(
+            lambda name: players.add(name[len(MPRIS_PREFIX) :]),
+            lambda name: players.remove(name[len(MPRIS_PREFIX) :]),
+        )
+    except Exception as e:
+        print(f"Could not watch the MPRIS players: {e}", file=sys.stderr)
+
+
+# Unauthenticated, answers as soon as the server runs. "backend" tells
+# whether the default backend is built yet
+def health_view():
+    backend = get_backend()
+    output = {"status": True, "backend": backend.get_build_state()}
+    if backend.error is not None:
+        output["error"] = backend.error
+    return output
+
+
+def make_app(
+    uses_auth: bool,
+    creds: dict,
+    backend_name: str,
+    version: str,
+    token_secret: bytes = None,
+    token_lifetime: int = 3600,
+    backend_options: dict = None,
+    read_freshness: float = 0.0,
+    command_rate: float = None,
+    art_cache_dir: str = None,
+    art_cache_size: int = 64 * 1024 * 1024,
+    history_path: str = None,
+    rate_limits: dict = None,
+    max_in_flight: int = None,
+    max_streams: int = None,
+):
     app = Flask(__name__)
     if uses_auth:
         api = Api(
@@ -45,6 +102,7 @@ API. Locked with basic auth",
         )
 
         set_valid_users(creds)
+        set_token_settings(token_secret, token_lifetime)
     else:
         api = Api(
             app,
@@ -56,16 +114,57 @@ API.",
 
         disable_authentication()
 
+    api.representations.update(get_representations())
     api.add_model("Ok", normal_model)
     api.add_model("Error", error_model)
+    api.add_namespace(auth_api)
     api.add_namespace(meta_api)
     api.add_namespace(player_api)
     api.add_namespace(status_api)
+    api.add_namespace(batch_api)
+    api.add_namespace(players_api)
+    sock.init_app(app)
+    app.before_request(check_websocket_support)
+    instrument_app(app)
+    app.add_url_rule("/metrics", "metrics", basic_auth_required(metrics_view))
+    app.add_url_rule("/health", "health", health_view)
 
-    set_backend(AVAILABLE_BACKENDS.get(backend_name)())
-
-    if get_backend() is None:
+    if backend_name not in available_backends():
         print(f'Backend "{backend_name}" not found !', file=sys.stderr)
         sys.exit(1)
 
+    # Shared by the backends of all players
+    admission = Admission(max_in_flight) if max_in_flight else None
+
+    # Backends are built on first use, the server answers right away
+    def make_backend(player_id: str = None):
+        options = dict(backend_options or {})
+        if player_id is not None:
+            options["bus_name"] = MPRIS_PREFIX + player_id
+        backend = LazyBackend(lambda: load_backend(backend_name)(**options))
+        # Coalesced reads only take one slot of the admission control
+        return coalesce_backend_reads(
+            admit_backend_calls(instrument_backend(backend), admission),
+            read_freshness,
+        )
+
+    backend = make_backend()
+    set_backend(backend)
+    if backend_name == "dbus":
+        bus_name = (backend_options or {}).get("bus_name", BUS_NAME)
+        players = PlayerRegistry(bus_name[len(MPRIS_PREFIX) :], backend, make_backend)
+        # Every other MPRIS player on the bus is served under its own id
+        threading.Thread(
+            target=_watch_players, args=(players,), name="players", daemon=True
+        ).start()
+    else:
+        players = PlayerRegistry(backend_name, backend)
+    set_players(players)
+    app.wsgi_app = PlayerRoutingMiddleware(app.wsgi_app, players)
+    set_command_queue(command_rate)
+    set_rate_limits(rate_limits)
+    set_max_streams(max_streams)
+    set_art_cache(art_cache_dir, art_cache_size, backend)
+    set_history(history_path, backend)
+
     return app
@@ -1,12 +1,33 @@
-import base64
+import functools
+import hashlib
+import json
+import math
+import threading
 
-from flask import request
+from flask import Response, g, request
 from flask_restx import Model, fields
 
+try:
+    import orjson
+except ImportError:  # Optional, only makes the JSON responses faster
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional, only needed by the MessagePack representations
+    msgpack = None
+
+from .auth import verify_basic, verify_token
 from .backends import SpotifyAPIBackend
-from .db import get_valid_users
+from .history import RECORDED_KEYS
+from .players import PlayerRegistry, get_player
+from .ratelimit import get_rate_limiter, route_class
 
 BACKEND = None
+PLAYERS = None
+# Free slots for long-lived connections (event streams and WebSockets), None
+# when they are not limited
+STREAM_SLOTS = None
 
 normal_model = Model(
     "Ok",
@@ -32,43 +53,230 @@ error_model = Model(
 )
 
 
+# Output: the authenticated username, or False
 def check_basic_auth(auth_header):
-    if not auth_header or not auth_header.startswith("Basic "):
+    if not auth_header:
         return False
 
-    encoded_credentials = auth_header.split(" ")[1]
-    try:
-        decoded = base64.b64decode(encoded_credentials).decode("utf-8")
-        username, password = decoded.split(":")
-        return get_valid_users().get(username) == password
-    except Exception:
+    if auth_header.startswith("Bearer "):
+        username = verify_token(auth_header[len("Bearer ") :])
+    elif auth_header.startswith("Basic "):
+        username = verify_basic(auth_header)
+    else:
         return False
+    return username if username is not None else False
+
+
+def is_authenticated(auth_header) -> bool:
+    return check_basic_auth(auth_header)
+
+
+# Input: the user from check_basic_auth, and the class of the limits
+# Output: 0 when the request may go on, or the seconds to wait before retrying
+def check_rate_limit(user, limits_class: str) -> int:
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return 0
+    # Without authentication, every client address counts as a user
+    return math.ceil(
+        rate_limiter.take(
+            user if isinstance(user, str) else request.remote_addr, limits_class
+        )
+    )
+
+
+# Result of an operation over the rate limit, for the batch and WebSocket
+# commands
+def rate_limited_output(retry_after: int) -> dict:
+    return {"status": False, "error": "rate limit exceeded", "retry_after": retry_after}
+
+
+def _too_many_requests(retry_after: int):
+    return (
+        {"status": False, "error": "rate limit exceeded"},
+        429,
+        {"Retry-After": str(retry_after)},
+    )
+
+
+# Failed authentications are limited per client address, checked before
+# paying for the password hash again
+# Output: 0 when the client may try to authenticate, or the seconds to wait
+#         before retrying
+def check_auth_rate_limit() -> int:
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return 0
+    return math.ceil(rate_limiter.wait(request.remote_addr, "auth"))
+
+
+def record_auth_failure():
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is not None:
+        rate_limiter.take(request.remote_addr, "auth")
 
 
 def basic_auth_required(func):
     def wrapper(*args, **kwargs):
+        retry_after = check_auth_rate_limit()
+        if retry_after:
+            return _too_many_requests(retry_after)
         auth = request.headers.get("Authorization")
-        if not check_basic_auth(auth):
+        user = check_basic_auth(auth)
+        if not user:
+            record_auth_failure()
             return {"message": "Unauthorized"}, 401
+        g.user = user
+        retry_after = check_rate_limit(user, route_class(request.method))
+        if retry_after:
+            return _too_many_requests(retry_after)
         return func(*args, **kwargs)
 
     return wrapper
 
 
+# Revalidate on every use, never store in shared caches
+READ_CACHE_CONTROL = "private, no-cache"
+
+
+# Must be placed under basic_auth_required. Answers GET requests with an ETag
+# derived from the backend state tag, and with 304 Not Modified when the
+# client already holds that version. The tag is read before the handler runs,
+# so a change in between only ever makes the ETag older than the body.
+# `unless(request)` returning True skips the ETag (position dependent reads)
+def conditional_get(unless=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            tag = None
+            if backend is not None and not (unless is not None and unless(request)):
+                tag = backend.get_state_tag()
+            if tag is None:
+                output = func(*args, **kwargs)
+                if isinstance(output, tuple):
+                    return output + ({"Cache-Control": READ_CACHE_CONTROL},)
+                return output
+
+            digest = hashlib.blake2b(digest_size=12)
+            digest.update(request.path.encode())
+            digest.update(b"?" + request.query_string)
+            digest.update(request.headers.get("Accept", "").encode())
+            digest.update(tag.encode())
+            etag = digest.hexdigest()
+            headers = {
+                "ETag": f'"{etag}"',
+                "Cache-Control": READ_CACHE_CONTROL,
+                "Vary": "Accept",
+            }
+            if request.if_none_match.contains(etag):
+                return Response(status=304, headers=headers)
+
+            output = func(*args, **kwargs)
+            if not isinstance(output, tuple) or output[1] != 200:
+                return output
+            return output + (headers,)
+
+        return wrapper
+
+    return decorator
+
+
 def formated_output(output: dict):
-    error_code = (
-        200
-        if output.get("status")
-        else output.get(
-            "http_status_code",
-            500,
-        )
+    error_code = output.get(
+        "http_status_code",
+        200 if output.get("status") else 500,
     )
     if output.get("http_status_code") is not None:
         output.pop("http_status_code")
     return (output, error_code)
 
 
+def dumps_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+JSON_MEDIATYPE = "application/json"
+MSGPACK_MEDIATYPE = "application/msgpack"
+COMPACT_JSON_MEDIATYPE = "application/vnd.spotify-api.compact+json"
+COMPACT_MSGPACK_MEDIATYPE = "application/vnd.spotify-api.compact+msgpack"
+
+# Positional layouts of the compact representations: the objects under these
+# keys become arrays of their values in this order, null for the missing ones
+# (and other keys are left out). Every other object becomes the array of its
+# values in the order the API builds them, e.g. [status, volume]
+TRACK_FIELDS = (
+    "trackid",
+    "length",
+    "artUrl",
+    "album",
+    "albumArtist",
+    "artist",
+    "autoRating",
+    "discNumber",
+    "title",
+    "trackNumber",
+    "url",
+)
+COMPACT_LAYOUTS = {
+    "current_song": TRACK_FIELDS,
+    "state": ("position", "loop", "shuffle", "volume", "playing", "current_song"),
+    "history": ("t",) + RECORDED_KEYS,
+}
+
+
+def compact(value, key: str = None):
+    if isinstance(value, dict):
+        layout = COMPACT_LAYOUTS.get(key)
+        if layout is None:
+            return [compact(item, name) for name, item in value.items()]
+        return [compact(value.get(name), name) for name in layout]
+    if isinstance(value, (list, tuple)):
+        return [compact(item, key) for item in value]
+    return value
+
+
+# Only the outputs of the routes are compacted: authentication and validation
+# errors, and swagger.json, keep their object form
+def is_output(data) -> bool:
+    return isinstance(data, dict) and "status" in data
+
+
+def make_representation(encode, compacted: bool = False):
+    def representation(data, code: int, headers=None) -> Response:
+        if compacted and is_output(data):
+            data = compact(data)
+        response = Response(encode(data), code)
+        if headers:
+            response.headers.extend(headers)
+        response.vary.add("Accept")
+        return response
+
+    return representation
+
+
+# JSON representation of the Api, building the response in one step instead
+# of going through the generic one of flask-restx
+output_json = make_representation(dumps_json)
+
+
+# Representations of the Api by mediatype, picked from the Accept header.
+# JSON stays the default, the MessagePack ones need msgpack installed
+def get_representations() -> dict:
+    representations = {
+        JSON_MEDIATYPE: output_json,
+        COMPACT_JSON_MEDIATYPE: make_representation(dumps_json, compacted=True),
+    }
+    if msgpack is not None:
+        representations[MSGPACK_MEDIATYPE] = make_representation(msgpack.packb)
+        representations[COMPACT_MSGPACK_MEDIATYPE] = make_representation(
+            msgpack.packb, compacted=True
+        )
+    return representations
+
+
 def disable_authentication():
     global check_basic_auth
 
@@ -76,10 +284,43 @@ def disable_authentication():
         return True # Bypass authentication
 
 
-def get_backend():
-    return BACKEND
+# Backend of the given player, or of the one the current request is routed to
+def get_backend(player: str = None):
+    if player is None:
+        player = get_player()
+    if player is None or PLAYERS is None:
+        return BACKEND
+    return PLAYERS.get(player)
 
 
 def set_backend(backend: SpotifyAPIBackend):
     global BACKEND
     BACKEND = backend
+
+
+def get_players() -> PlayerRegistry:
+    return PLAYERS
+
+
+def set_players(players: PlayerRegistry):
+    global PLAYERS
+    PLAYERS = players
+
+
+# Each event stream or WebSocket holds a worker thread for as long as it is
+# open, so a threaded server needs more threads than streams to keep serving
+# requests
+def set_max_streams(max_streams: int = None):
+    global STREAM_SLOTS
+    STREAM_SLOTS = threading.BoundedSemaphore(max_streams) if max_streams else None
+
+
+# Output: True if a new stream may be opened. It must then be released with
+# release_stream_slot once closed
+def acquire_stream_slot() -> bool:
+    return STREAM_SLOTS is None or STREAM_SLOTS.acquire(blocking=False)
+
+
+def release_stream_slot():
+    if STREAM_SLOTS is not None:
+        STREAM_SLOTS.release()
@@ -0,0 +1,169 @@
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+
+import json
+import socket
+import threading
+
+from flask import request
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
+
+from .commands import run_command
+from .ratelimit import command_class
+from .web_server_utils import (acquire_stream_slot, check_auth_rate_limit,
+                               check_rate_limit, get_backend, is_authenticated,
+                               rate_limited_output, record_auth_failure,
+                               release_stream_slot)
+
+sock = Sock()
+
+# Seconds the first message may take to arrive when it has to authenticate
+AUTH_TIMEOUT = 10
+# WSGI environ keys through which a server hands the connection over to
+# simple-websocket. waitress has none of them
+SOCKET_ENVIRON_KEYS = ("werkzeug.socket", "gunicorn.socket", "eventlet.input")
+
+
+def has_socket(environ: dict) -> bool:
+    return any(key in environ for key in SOCKET_ENVIRON_KEYS) or environ.get(
+        "SERVER_SOFTWARE", ""
+    ).startswith("gevent")
+
+
+# Registered as before_request: answers the handshake with 501 on servers that
+# can't give the connection away (waitress), instead of failing with a 500
+def check_websocket_support():
+    if request.path == "/api/ws" and not has_socket(request.environ):
+        return {
+            "status": False,
+            "error": "this server can not serve WebSockets, run the API with \
+the development server or gunicorn",
+        }, 501
+    return None
+
+
+# Messages sent by the client:
+#   {"id": any, "cmd": "set_volume", "args": {"volume": 0.3}}
+#   {"id": any, "cmd": "auth", "args": {"authorization": "Basic ..."}}
+# Messages sent by the server:
+#   {"id": same id, "result": {"status": True, ...}}
+#   {"id": same id, "result": {"status": False, "error": "rate limit exceeded",
+#                              "retry_after": seconds}}
+#   {"event": "volume", "data": {"volume": 0.3}}
+#   {"event": "dropped", "data": number of unread events replaced by newer ones}
+# The connection is authenticated once, either by the Authorization header of
+# the handshake or, for clients that can not set it, by an "auth" command as
+# the first message. Failed attempts count against the same per address limit
+# as the REST routes, a client over it is closed with 1013.
+@sock.route("/api/ws")
+def control(ws):
+    if check_auth_rate_limit():
+        ws.close(reason=1013, message="rate limit exceeded")
+        return
+    header = request.headers.get("Authorization")
+    user = is_authenticated(header)
+    if not user:
+        if header is not None:
+            record_auth_failure()
+            if check_auth_rate_limit():
+                ws.close(reason=1013, message="rate limit exceeded")
+                return
+        user = _authenticate(ws)
+        if not user:
+            ws.close(reason=1008, message="Unauthorized")
+            return
+
+    backend = get_backend()
+    if backend is None:
+        ws.close(reason=1011, message="backend is None")
+        return
+    if not acquire_stream_slot():
+        ws.close(reason=1013, message="too many streams open")
+        return
+    try:
+        _serve(ws, backend, user)
+    finally:
+        release_stream_slot()
+
+
+def _serve(ws, backend, user):
+    # Replies and pushed events are small writes, don't let Nagle delay them
+    ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    send_lock = threading.Lock()
+
+    def send(message: dict):
+        with send_lock:
+            ws.send(json.dumps(message))
+
+    subscription = backend.events.subscribe()
+    closed = threading.Event()
+
+    def push_events():
+        try:
+            while not closed.is_set():
+                event = subscription.get(timeout=1)
+                dropped = subscription.pop_dropped()
+                if dropped:
+                    send({"event": "dropped", "data": dropped})
+                if event is not None:
+                    send({"event": event[0], "data": event[1]})
+        except ConnectionClosed:
+            pass
+
+    pusher = threading.Thread(target=push_events, name="ws-events", daemon=True)
+    pusher.start()
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                continue
+            send(_handle_message(backend, message, user))
+    finally:
+        closed.set()
+        backend.events.unsubscribe(subscription)
+
+
+# Output: the authenticated user, or False
+def _authenticate(ws):
+    try:
+        message = json.loads(ws.receive(timeout=AUTH_TIMEOUT) or "")
+    except (ValueError, ConnectionClosed):
+        return False
+    if not isinstance(message, dict) or message.get("cmd") != "auth":
+        return False
+    args = message.get("args") or {}
+    user = is_authenticated(args.get("authorization"))
+    if not user:
+        record_auth_failure()
+        return False
+    ws.send(json.dumps({"id": message.get("id"), "result": {"status": True}}))
+    return user
+
+
+# Commands count against the same limits as the REST routes of the user
+def _handle_message(backend, message, user) -> dict:
+    try:
+        message = json.loads(message)
+    except ValueError:
+        return {"id": None, "result": {"status": False, "error": "invalid json"}}
+    if not isinstance(message, dict):
+        return {
+            "id": None,
+            "result": {"status": False, "error": "message must be an object"},
+        }
+
+    retry_after = check_rate_limit(user, command_class(message.get("cmd")))
+    if retry_after:
+        return {"id": message.get("id"), "result": rate_limited_output(retry_after)}
+
+    result = run_command(backend, message.get("cmd"), message.get("args"), queue=True)
+    result.pop("http_status_code", None)
+    return {"id": message.get("id"), "result": result}
@@ -9,18 +9,89 @@
 ##############
 
 
+import os
+
 from core import make_app
 
 HOST = "0.0.0.0"
 PORT = 8080
+# "development" runs Flask's own server. "waitress" runs the production
+# waitress server with THREADS worker threads. waitress can't serve the
+# /api/ws WebSocket, use gunicorn on wsgi.py for it (see README)
+SERVER = "development"
+THREADS = 8
+# Most /api/meta/events streams and /api/ws connections open at once. Each
+# one holds a worker thread while open, keep it below the threads of the
+# server so that requests are still served. None does not limit them, except
+# under the waitress SERVER where half of THREADS are left to streams
+MAX_STREAMS = None
 
 USES_AUTHENTICATION = False
 USERS = {"user": "password"}
+# Secret signing the bearer tokens of /api/auth/token. None picks a random one
+# at every start, which invalidates previously issued tokens
+TOKEN_SECRET = None
+TOKEN_LIFETIME = 3600
 
 BACKEND = "dbus"
+# Keyword arguments given to the backend. For the "simulated" backend, e.g.
+# {"latency": {"default": ("lognormal", 2, 0.5)}, "error_rate": {"skip": 0.1}}
+BACKEND_OPTIONS = {}
+
+# Seconds a backend read (volume, current song...) keeps answering identical
+# reads. Concurrent identical reads always share a single backend call
+READ_FRESHNESS = 0.0
+# Most seek / position / volume commands applied per second. When set, these
+# commands are merged and answered with 202 as soon as they are queued.
+# None applies every command before answering
+COMMAND_RATE = None
+# Directory caching the track covers served by /api/meta/art, and the most
+# bytes it may hold. None disables the cache
+ART_CACHE_DIR = os.path.expanduser("~/.cache/local-spotify-api/art")
+ART_CACHE_SIZE = 64 * 1024 * 1024
+# Log of the tracks played, served by /api/meta/history, e.g.
+# os.path.expanduser("~/.local/share/local-spotify-api/history.log").
+# None disables it
+HISTORY_PATH = None
+# Requests per second and burst allowed to every user, for GET routes ("read")
+# and the others ("control"), e.g. {"read": (20, 40), "control": (5, 10)},
+# and failed authentications allowed per client address ("auth"). Over it,
+# requests are answered 429 with Retry-After. None disables it
+RATE_LIMITS = None
+# Most backend calls running at once. Calls beyond it are answered 503 instead
+# of waiting on the player. None disables the cap
+MAX_IN_FLIGHT = None
 
 VERSION = "1.0"
 
+
+def create_app(max_streams: int = MAX_STREAMS):
+    return make_app(
+        USES_AUTHENTICATION,
+        USERS,
+        BACKEND,
+        VERSION,
+        TOKEN_SECRET,
+        TOKEN_LIFETIME,
+        BACKEND_OPTIONS,
+        READ_FRESHNESS,
+        COMMAND_RATE,
+        ART_CACHE_DIR,
+        ART_CACHE_SIZE,
+        HISTORY_PATH,
+        RATE_LIMITS,
+        MAX_IN_FLIGHT,
+        max_streams,
+    )
+
+
 if __name__ == "__main__":
-    app = make_app(USES_AUTHENTICATION, USERS, BACKEND, VERSION)
-    app.run(host=HOST, port=PORT, debug=False)
+    if SERVER == "waitress":
+        from waitress import serve
+
+        max_streams = MAX_STREAMS
+        if max_streams is None:
+            max_streams = max(THREADS // 2, 1)
+        serve(create_app(max_streams), host=HOST, port=PORT, threads=THREADS)
+    else:
+        create_app().run(host=HOST, port=PORT, debug=False, threaded=True)
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import time
+
+import pytest
+
+from core import auth, make_app
+from core.auth import issue_token, set_token_settings, verify_basic, verify_token
+from core.db import set_valid_users
+
+
+def basic(username: str, password: str) -> str:
+    return "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+
+
+@pytest.fixture(autouse=True)
+def users():
+    set_valid_users({"user": "password"})
+    set_token_settings(b"secret", 3600)
+
+
+def test_token_is_verified():
+    token, expires = issue_token("user")
+    assert verify_token(token) == "user"
+    assert expires > time.time()
+
+
+def test_tampered_token_is_refused():
+    token, _ = issue_token("user")
+    payload, _, signature = token.rpartition(".")
+    assert verify_token(f"admin{payload[4:]}.{signature}") is None
+    assert verify_token(f"{payload}.{'0' * len(signature)}") is None
+    assert verify_token("garbage") is None
+
+
+def test_non_ascii_token_is_refused():
+    assert verify_token("abc.\xe9") is None
+
+
+def test_expired_token_is_refused():
+    set_token_settings(b"secret", -1)
+    token, _ = issue_token("user")
+    assert verify_token(token) is None
+
+
+def test_token_of_other_secret_is_refused():
+    token, _ = issue_token("user")
+    set_token_settings(b"other secret", 3600)
+    assert verify_token(token) is None
+
+
+def test_token_of_removed_user_is_refused():
+    token, _ = issue_token("user")
+    set_valid_users({"other": "password"})
+    assert verify_token(token) is None
+
+
+def test_basic_is_verified():
+    assert verify_basic(basic("user", "password")) == "user"
+    assert verify_basic(basic("user", "wrong")) is None
+    assert verify_basic(basic("nobody", "password")) is None
+    assert verify_basic("Basic not base64") is None
+
+
+def test_verified_basic_cache_follows_users():
+    header = basic("user", "password")
+    assert verify_basic(header) == "user"
+    assert hashlib.sha256(header.encode()).digest() in auth._verified_headers
+    assert not any(isinstance(key, str) for key in auth._verified_headers)
+
+    set_valid_users({"user": "new password"})
+    assert verify_basic(header) is None
+    assert verify_basic(basic("user", "new password")) == "user"
+
+
+@pytest.fixture
+def client():
+    app = make_app(True, {"user": "password"}, "simulated", "test", b"secret")
+    return app.test_client()
+
+
+def test_token_route_issues_tokens_for_basic(client):
+    response = client.post(
+        "/api/auth/token", headers={"Authorization": basic("user", "password")}
+    )
+    assert response.status_code == 200
+    token = response.json["token"]
+    response = client.get(
+        "/api/status/volume", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+
+
+def test_token_route_does_not_renew_tokens(client):
+    token, _ = issue_token("user")
+    response = client.post(
+        "/api/auth/token", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 401
+    assert "token" not in response.json
+
+
+def test_non_ascii_bearer_is_unauthorized(client):
+    response = client.get(
+        "/api/status/volume", headers={"Authorization": "Bearer abc.\xe9"}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from core import history
+from core.history import CHECKPOINT, History
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(history, "CHECKPOINT_INTERVAL", 4)
+
+
+def song(i: int) -> dict:
+    return {"trackid": f"/track/{i}", "title": f"Track {i}", "length": i}
+
+
+def fill(path: str, count: int) -> History:
+    log = History(path)
+    for i in range(count):
+        log.record(song(i), played_at=1000 + i)
+    return log
+
+
+def pages(log: History, **query) -> list:
+    titles = []
+    cursor = None
+    while True:
+        output = log.query(cursor=cursor, limit=3, **query)
+        assert output["status"]
+        titles += [record["title"] for record in output["history"]]
+        cursor = output["next_cursor"]
+        if cursor is None:
+            return titles
+
+
+def titles(indexes) -> list:
+    return [f"Track {i}" for i in indexes]
+
+
+def test_pages_newest_first(tmp_path):
+    log = fill(str(tmp_path / "history.log"), 21)
+    assert pages(log) == titles(range(20, -1, -1))
+    assert pages(log, since=1005, until=1017) == titles(range(16, 4, -1))
+
+
+def test_pages_oldest_first(tmp_path):
+    log = fill(str(tmp_path / "history.log"), 21)
+    assert pages(log, oldest_first=True) == titles(range(21))
+    assert pages(log, since=1005, until=1017, oldest_first=True) == titles(
+        range(5, 17)
+    )
+
+
+def test_same_track_recorded_once(tmp_path):
+    log = History(str(tmp_path / "history.log"))
+    log.record(song(1), played_at=1000)
+    log.record(dict(song(1), title="Updated"), played_at=1001)
+    assert log.query()["history"] == [dict(song(1), t=1000)]
+
+
+def test_invalid_cursor(tmp_path):
+    log = fill(str(tmp_path / "history.log"), 5)
+    for cursor in ("abc", "5", str(10**9)):
+        output = log.query(cursor=cursor)
+        assert not output["status"]
+        assert output["http_status_code"] == 400
+
+
+def test_invalid_limit(tmp_path):
+    log = fill(str(tmp_path / "history.log"), 5)
+    for oldest_first in (False, True):
+        output = log.query(limit=0, oldest_first=oldest_first)
+        assert not output["status"]
+        assert output["http_status_code"] == 400
+
+
+def test_torn_record_is_dropped(tmp_path):
+    path = str(tmp_path / "history.log")
+    fill(path, 10)
+    with open(path, "ab") as file:
+        file.write(b'{"t":1010,"trackid":"/tr')
+
+    log = History(path)
+    assert pages(log, oldest_first=True) == titles(range(10))
+    log.record(song(10), played_at=1010)
+    assert pages(log, oldest_first=True) == titles(range(11))
+
+
+@pytest.mark.parametrize("damage", ["missing", "truncated", "torn"])
+def test_index_is_rebuilt(tmp_path, damage):
+    path = str(tmp_path / "history.log")
+    fill(path, 21)
+    index_path = path + ".idx"
+    with open(index_path, "rb") as index:
+        data = index.read()
+    if damage == "missing":
+        os.remove(index_path)
+    else:
+        kept = CHECKPOINT.size * 2 + (3 if damage == "torn" else 0)
+        with open(index_path, "wb") as index:
+            index.write(data[:kept])
+
+    log = History(path)
+    assert log.offsets == [offset for _, offset in CHECKPOINT.iter_unpack(data)]
+    assert pages(log) == titles(range(20, -1, -1))
+    log.record(song(21), played_at=1021)
+    assert pages(log, oldest_first=True) == titles(range(22))
+
+
+def test_second_process_only_reads(tmp_path):
+    path = str(tmp_path / "history.log")
+    writer = fill(path, 6)
+    reader = History(path)
+    assert writer.writer and not reader.writer
+
+    reader.record(song(100), played_at=2000)
+    writer.record(song(6), played_at=1006)
+    assert pages(reader) == titles(range(6, -1, -1))
+    assert pages(writer) == titles(range(6, -1, -1))
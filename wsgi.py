@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+##############
+#
+#     @
+#       @
+#   @ @ @
+#
+##############
+
+# Entry point for WSGI servers, configured from main.py, e.g.:
+#   gunicorn --threads 8 --bind 0.0.0.0:8080 wsgi:app
+#   waitress-serve --threads 8 --port 8080 wsgi:app (without /api/ws)
+
+from main import create_app
+
+app = create_app()